@@ -0,0 +1,359 @@
+from datetime import date, time
+from operator import itemgetter
+import argparse
+import asyncio
+import os
+
+import asyncpg
+
+from config import ASYNC_DB, KEY_FILTER
+from db_manager import prepare_artist
+from key_filter import KeyFilter
+
+# Альбомам нужен исполнитель, песням - альбом
+DEPENDENCIES = {'artists': None, 'albums': 'artists', 'songs': 'albums'}
+
+# Ключи строк буферов: никнейм исполнителя, названия альбома и песни
+ROW_KEYS = {
+    'artists': itemgetter(0),
+    'albums': itemgetter(3, 0),
+    'songs': itemgetter(2, 3, 0),
+}
+
+
+class AsyncDatabaseSink:
+    """
+    Асинхронная запись в базу данных для asyncio-парсера:
+    строки копятся пачками, каждая пачка пишется конвейером
+    executemany в своей транзакции, количество одновременно
+    записываемых пачек ограничено. Уникальных ограничений в таблицах
+    нет, поэтому уже существующие строки отбрасываются до записи
+    по ключам, загруженным из базы данных
+    """
+
+    def __init__(self, batch_size: int = ASYNC_DB['BATCH_SIZE'],
+                 max_in_flight: int = ASYNC_DB['MAX_IN_FLIGHT'],
+                 skip_existing: bool = True,
+                 schema_name: str | None = None):
+        self.user = os.getenv('DB_USER')
+        self.name = os.getenv('DB_NAME')
+        self.password = os.getenv('DB_PASSWORD')
+        self.port = os.getenv('DB_PORT')
+        self.host = os.getenv('DB_HOST')
+        self.schema_name = (schema_name or os.getenv('SCHEMA_NAME')
+                            or 'public')
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.skip_existing = skip_existing
+        self.queries = self.build_queries()
+        self.keys: dict[str, KeyFilter] = {
+            kind: KeyFilter(0) for kind in DEPENDENCIES}
+        self.buffers: dict[str, list[tuple]] = {
+            kind: [] for kind in DEPENDENCIES}
+        self.tasks: dict[str, set[asyncio.Task]] = {
+            kind: set() for kind in DEPENDENCIES}
+        self.rows = 0
+
+    async def __aenter__(self):
+        self.pool = await asyncpg.create_pool(
+            database=self.name,
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+            min_size=1,
+            max_size=self.max_in_flight,
+        )
+        self.slots = asyncio.Semaphore(self.max_in_flight)
+        print('Подключение установлено!')
+        if self.skip_existing:
+            await self.warm_existing_keys()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                await self.flush('songs')
+        finally:
+            await self.pool.close()
+            print('Подключение разорвано!')
+
+    async def warm_existing_keys(self) -> None:
+        """
+        Потоково загружает ключи уже существующих исполнителей,
+        альбомов и песен. Перепроверка фильтра Блума синхронная,
+        поэтому ключи хранятся точным множеством
+
+        Returns:
+            None
+        """
+        schema = self.schema_name
+        queries = {
+            'artists': f'SELECT username FROM {schema}.artist_artist;',
+            'albums': f'''
+                SELECT artist.username, album.name
+                FROM {schema}.albums_album AS album
+                JOIN {schema}.artist_artist AS artist
+                    ON artist.id = album.artist_id;
+            ''',
+            'songs': f'''
+                SELECT artist.username, album.name, song.name
+                FROM {schema}.song_song AS song
+                JOIN {schema}.albums_album AS album
+                    ON album.id = song.album_id
+                JOIN {schema}.artist_artist AS artist
+                    ON artist.id = album.artist_id;
+            ''',
+        }
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                for kind, query in queries.items():
+                    keys = self.keys[kind]
+                    cursor = connection.cursor(
+                        query, prefetch=KEY_FILTER['ITERSIZE'])
+                    async for record in cursor:
+                        keys.add(record[0] if len(record) == 1
+                                 else tuple(record))
+
+    def build_queries(self) -> dict[str, str]:
+        schema = self.schema_name
+        return {
+            'artists': f'''
+                INSERT INTO {schema}.artist_artist(username, description, avatar)
+                VALUES ($1, $2, $3);
+            ''',
+            'albums': f'''
+                INSERT INTO {schema}.albums_album(
+                    name, publication_date, cover, artist_id)
+                SELECT $1, $2, $3, artist.id
+                FROM {schema}.artist_artist AS artist
+                WHERE artist.username = $4;
+            ''',
+            'songs': f'''
+                INSERT INTO {schema}.song_song(name, duration, album_id)
+                SELECT $1, $2, album.id
+                FROM {schema}.albums_album AS album
+                JOIN {schema}.artist_artist AS artist
+                    ON artist.id = album.artist_id
+                WHERE artist.username = $3 AND album.name = $4;
+            ''',
+        }
+
+    async def add_artist(self, username: str, description: str,
+                         avatar: str) -> None:
+        await self.add('artists', prepare_artist(username, description, avatar))
+
+    async def add_album(self, artist: str, name: str,
+                        publication_date: date, cover: str) -> None:
+        await self.add('albums', (name, publication_date, cover, artist))
+
+    async def add_song(self, artist: str, album: str, name: str,
+                       duration: time) -> None:
+        await self.add('songs', (name, duration, artist, album))
+
+    async def add(self, kind: str, row: tuple) -> None:
+        """
+        Добавляет строку в буфер и отправляет полную пачку на запись
+
+        Args:
+            kind (str): "artists", "albums" или "songs"
+            row (tuple): строка
+
+        Returns:
+            None
+        """
+        buffer = self.buffers[kind]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            await self.submit(kind)
+
+    async def submit(self, kind: str) -> None:
+        """
+        Отправляет буфер на запись, дождавшись свободного слота
+        и записи пачек, от которых зависят строки буфера. Строки,
+        которые уже есть в базе или уже записаны, отбрасываются
+
+        Args:
+            kind (str): "artists", "albums" или "songs"
+
+        Returns:
+            None
+        """
+        rows = self.buffers[kind]
+        self.buffers[kind] = []
+        if self.skip_existing:
+            rows = self.keys[kind].new_rows(rows, ROW_KEYS[kind])
+        if not rows:
+            return
+        dependency = DEPENDENCIES[kind]
+        if dependency:
+            await self.flush(dependency)
+        self.collect(kind)
+        await self.slots.acquire()
+        self.tasks[kind].add(asyncio.create_task(self.write(kind, rows)))
+
+    def collect(self, kind: str) -> None:
+        """
+        Убирает завершённые пачки, пробрасывая ошибку записи
+
+        Args:
+            kind (str): "artists", "albums" или "songs"
+
+        Returns:
+            None
+        """
+        for task in [task for task in self.tasks[kind] if task.done()]:
+            self.tasks[kind].discard(task)
+            task.result()
+
+    async def write(self, kind: str, rows: list[tuple]) -> None:
+        try:
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    await connection.executemany(self.queries[kind], rows)
+            self.rows += len(rows)
+        finally:
+            self.slots.release()
+
+    async def flush(self, kind: str) -> None:
+        """
+        Записывает все буферы до указанного вида включительно
+        и дожидается завершения их пачек
+
+        Args:
+            kind (str): "artists", "albums" или "songs"
+
+        Returns:
+            None
+        """
+        dependency = DEPENDENCIES[kind]
+        if dependency:
+            await self.flush(dependency)
+        await self.submit(kind)
+        if self.tasks[kind]:
+            await asyncio.wait(self.tasks[kind])
+        self.collect(kind)
+
+
+def synthetic_artists(count: int) -> list[tuple[str, str, str]]:
+    return [(f'benchmark artist {index}', 'Синтетика.',
+             f'benchmark artist {index}.jpg') for index in range(count)]
+
+
+async def connect() -> 'asyncpg.Connection':
+    return await asyncpg.connect(
+        database=os.getenv('DB_NAME'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        host=os.getenv('DB_HOST'),
+        port=os.getenv('DB_PORT'),
+    )
+
+
+async def create_scratch_schema(scratch: str) -> None:
+    """
+    Создаёт временную схему с копией таблицы исполнителей, чтобы
+    замеры не оставляли синтетических строк в рабочих таблицах
+
+    Args:
+        scratch (str): название временной схемы
+
+    Returns:
+        None
+    """
+    schema = os.getenv('SCHEMA_NAME') or 'public'
+    connection = await connect()
+    try:
+        await connection.execute(f'''
+            CREATE SCHEMA {scratch};
+            CREATE TABLE {scratch}.artist_artist
+                (LIKE {schema}.artist_artist INCLUDING ALL);
+        ''')
+        default = await connection.fetchval(
+            'SELECT column_default FROM information_schema.columns '
+            'WHERE table_schema = $1 AND table_name = $2 '
+            'AND column_name = $3;', scratch, 'artist_artist', 'id')
+        # serial-колонка копируется вместе с последовательностью
+        # исходной таблицы, а identity-колонка получает свою
+        if default and 'nextval' in default:
+            await connection.execute(f'''
+                CREATE SEQUENCE {scratch}.artist_artist_id_seq
+                    OWNED BY {scratch}.artist_artist.id;
+                ALTER TABLE {scratch}.artist_artist ALTER COLUMN id
+                    SET DEFAULT nextval('{scratch}.artist_artist_id_seq');
+            ''')
+    finally:
+        await connection.close()
+
+
+async def drop_scratch_schema(scratch: str) -> None:
+    connection = await connect()
+    try:
+        await connection.execute(f'DROP SCHEMA IF EXISTS {scratch} CASCADE;')
+    finally:
+        await connection.close()
+
+
+async def benchmark_async(count: int, scratch: str) -> float:
+    started = asyncio.get_running_loop().time()
+    async with AsyncDatabaseSink(skip_existing=False,
+                                 schema_name=scratch) as sink:
+        for row in synthetic_artists(count):
+            await sink.add_artist(*row)
+    return count / (asyncio.get_running_loop().time() - started)
+
+
+def benchmark_sync(count: int, scratch: str) -> float:
+    """
+    Построчная запись, как в DatabaseManager.insert_artist:
+    отдельный запрос и фиксация на каждую строку, но без паузы
+    между строками и без вывода
+
+    Args:
+        count (int): количество строк
+        scratch (str): название временной схемы
+
+    Returns:
+        float: скорость записи, строк в секунду
+    """
+    from time import perf_counter
+    from db_manager import DatabaseManager
+
+    query = (f'INSERT INTO {scratch}.artist_artist'
+             f'(username, description, avatar) VALUES (%s, %s, %s);')
+    started = perf_counter()
+    with DatabaseManager() as db:
+        with db.connection.cursor() as cursor:
+            for row in synthetic_artists(count):
+                cursor.execute(query, prepare_artist(*row))
+                db.connection.commit()
+    return count / (perf_counter() - started)
+
+
+def main():
+    """
+    Сравнение скорости записи исполнителей: asyncpg-пачки против
+    построчной записи DatabaseManager. Замеры идут во временной
+    схеме, которая удаляется после них
+    """
+    arg_parser = argparse.ArgumentParser(
+        description='Сравнение асинхронной и синхронной записи в БД')
+    arg_parser.add_argument('--rows', type=int, default=100_000)
+    arg_parser.add_argument('--sync-rows', type=int, default=10_000,
+                            help='строк для построчной записи')
+    args = arg_parser.parse_args()
+    from dotenv import load_dotenv
+    load_dotenv()
+    scratch = f'benchmark_{os.getpid()}'
+    asyncio.run(create_scratch_schema(scratch))
+    try:
+        rate = asyncio.run(benchmark_async(args.rows, scratch))
+        print(f'asyncpg: {rate:,.0f} строк/сек.')
+        rate = benchmark_sync(args.sync_rows, scratch)
+        print(f'построчно: {rate:,.0f} строк/сек.')
+    finally:
+        asyncio.run(drop_scratch_schema(scratch))
+
+
+if __name__ == '__main__':
+    main()
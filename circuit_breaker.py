@@ -0,0 +1,79 @@
+from collections import deque
+import time
+
+from config import CIRCUIT_BREAKER
+from exceptions import CircuitOpenError
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для одного хоста: при всплеске ошибок
+    перестаёт пропускать запросы на время охлаждения
+    """
+
+    def __init__(self, host: str,
+                 window: int = CIRCUIT_BREAKER['WINDOW'],
+                 min_requests: int = CIRCUIT_BREAKER['MIN_REQUESTS'],
+                 error_rate: float = CIRCUIT_BREAKER['ERROR_RATE'],
+                 cool_down: float = CIRCUIT_BREAKER['COOL_DOWN']):
+        self.host = host
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.cool_down = cool_down
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.opened_at: float | None = None
+        self.half_open = False
+
+    def before_request(self) -> None:
+        """
+        Проверяет, можно ли отправить запрос.
+        После охлаждения пропускает пробный запрос
+
+        Raises:
+            CircuitOpenError: предохранитель разомкнут
+
+        Returns:
+            None
+        """
+        if self.opened_at is None:
+            return
+        if time.monotonic() - self.opened_at < self.cool_down:
+            raise CircuitOpenError(self.host)
+        self.opened_at = None
+        self.outcomes.clear()
+        self.half_open = True
+
+    def record(self, success: bool) -> None:
+        """
+        Учитывает результат запроса и при необходимости
+        размыкает предохранитель
+
+        Args:
+            success (bool): был ли запрос успешным
+
+        Returns:
+            None
+        """
+        self.outcomes.append(success)
+        if self.half_open:
+            # Пробный запрос после охлаждения решает судьбу предохранителя
+            self.half_open = False
+            if not success:
+                self.open()
+            return
+        if len(self.outcomes) < self.min_requests:
+            return
+        failures = self.outcomes.count(False)
+        if failures / len(self.outcomes) >= self.error_rate:
+            self.open()
+
+    def open(self) -> None:
+        """
+        Размыкает предохранитель на время охлаждения
+
+        Returns:
+            None
+        """
+        self.opened_at = time.monotonic()
+        print(f'Запросы к "{self.host}" приостановлены на '
+              f'{self.cool_down} сек.')
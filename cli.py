@@ -0,0 +1,351 @@
+"""
+Командная строка MusicParser: python -m cli <команда>
+
+Тяжёлые зависимости (bs4, requests, psycopg2) импортируются только
+внутри команд, которым они нужны. Режим демона принимает задания
+через локальный сокет, поэтому частые небольшие задания из cron
+не тратят время на запуск интерпретатора и импорты
+"""
+from contextlib import redirect_stdout, redirect_stderr
+import argparse
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+
+from config import DAEMON, ENUMS, INGEST, LIMITS, LOCAL_STORE
+
+
+def default_socket() -> str:
+    """
+    Возвращает путь к сокету демона в папке, доступной только
+    текущему пользователю
+
+    Raises:
+        PermissionError: папка принадлежит другому пользователю
+        или доступна другим пользователям
+
+    Returns:
+        str: путь к сокету
+    """
+    folder = os.environ.get('XDG_RUNTIME_DIR')
+    if not folder:
+        folder = os.path.join(tempfile.gettempdir(),
+                              f'musicparser-{os.getuid()}')
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+    info = os.lstat(folder)
+    if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+            or info.st_mode & 0o077):
+        raise PermissionError(
+            f'Папка "{folder}" должна принадлежать текущему пользователю '
+            f'и иметь права 0700')
+    return os.path.join(folder, DAEMON['SOCKET_NAME'])
+
+
+class Context:
+    """
+    Общее состояние команд; в режиме демона живёт между заданиями.
+    Парсеры создаются по одному на источник данных
+    """
+
+    def __init__(self) -> None:
+        self.source = 'html'
+        self.parsers: dict = {}
+
+    @property
+    def parser(self):
+        if self.source not in self.parsers:
+            if self.source == 'api':
+                from lastfm_api import LastFmApiParser
+                self.parsers[self.source] = LastFmApiParser()
+            else:
+                from parser import MusicParser
+                self.parsers[self.source] = MusicParser()
+        return self.parsers[self.source]
+
+    def save(self) -> None:
+        """
+        Сохраняет накопленное состояние созданных парсеров
+
+        Returns:
+            None
+        """
+        for parser in self.parsers.values():
+            parser.negative_cache.save()
+
+
+def crawl_genre(context: Context, args: argparse.Namespace) -> None:
+    pages = context.parser.iter_paginated_artists_by_genre(
+        args.genre, last_page=args.pages)
+    for page, artists in pages:
+        context.parser.parse_artists(args.genre, page, artists)
+
+
+def crawl_artist(context: Context, args: argparse.Namespace) -> None:
+    pages = context.parser.iter_artist_albums(
+        args.artist, last_page=args.pages)
+    for page, titles in pages:
+        context.parser.parse_albums(args.artist, page, titles)
+        if args.songs:
+            for title in titles:
+                context.parser.write_album_songs(args.artist, title)
+
+
+def download_media(context: Context, args: argparse.Namespace) -> None:
+    for page in range(1, args.pages + 1):
+        if args.genre:
+            context.parser.save_images(args.genre, page)
+        if args.artist:
+            context.parser.save_covers(args.artist, page)
+
+
+def load_db(context: Context, args: argparse.Namespace) -> None:
+    from db_manager import DatabaseManager
+    from ingest import Ingestor
+
+    with DatabaseManager() as db:
+        Ingestor(db, args.workers).ingest(args.root)
+
+
+def build_store(context: Context, args: argparse.Namespace) -> None:
+    from local_store import LocalStore
+
+    with LocalStore(args.path) as store:
+        store.build(args.root)
+
+
+def refresh(context: Context, args: argparse.Namespace) -> None:
+    from incremental import IncrementalCrawler
+
+    crawler = IncrementalCrawler(context.parser)
+    artists: set[str] = set()
+    for genre in args.genres:
+        crawler.refresh_genre(genre)
+        artists |= crawler.stored_artists(genre)
+    if not args.skip_albums:
+        for artist in sorted(artists):
+            crawler.refresh_artist(artist)
+    crawler.write_delta()
+
+
+def apply_delta(context: Context, args: argparse.Namespace) -> None:
+    from db_manager import DatabaseManager
+    from ingest import Ingestor
+
+    with DatabaseManager() as db:
+        Ingestor(db).apply_delta(args.path)
+
+
+def plan(context: Context, args: argparse.Namespace) -> None:
+    from planner import JobSpec, estimate
+
+    spec = JobSpec(tuple(args.genres), args.artist_pages, args.album_pages,
+                   args.albums_per_artist)
+    print(json.dumps(estimate(spec), indent=2))
+
+
+def schedule(context: Context, args: argparse.Namespace) -> None:
+    from planner import JobSpec, PriorityScheduler
+
+    spec = JobSpec(tuple(args.genres), args.artist_pages, args.album_pages,
+                   args.albums_per_artist)
+    scheduler = PriorityScheduler(context.parser, spec, args.budget)
+    scheduler.run()
+    print(f'Запросов: {scheduler.spent}')
+
+
+def add_job_arguments(command: argparse.ArgumentParser) -> None:
+    """
+    Добавляет аргументы описания задания JobSpec
+
+    Args:
+        command (argparse.ArgumentParser): разбор аргументов команды
+
+    Returns:
+        None
+    """
+    command.add_argument('--genres', nargs='+', default=ENUMS['GENRES'])
+    command.add_argument('--artist-pages', type=int,
+                         default=LIMITS['ARTISTS_PAGE_LIMIT'])
+    command.add_argument('--album-pages', type=int,
+                         default=LIMITS['ARTIST_ALBUMS_PAGE_LIMIT'])
+    command.add_argument('--albums-per-artist', type=int)
+
+
+def serve(context: Context, args: argparse.Namespace) -> None:
+    class JobHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            request = json.loads(self.rfile.readline())
+            status, output = run_job(context, request['argv'])
+            reply = {'status': status, 'output': output}
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+    socket_path = args.socket or default_socket()
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    # Сокет создаётся сразу с правами 0600: задания может отправлять
+    # только владелец демона
+    umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, JobHandler)
+    finally:
+        os.umask(umask)
+    os.chmod(socket_path, 0o600)
+    with server:
+        print(f'Демон ожидает задания на "{socket_path}"')
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+def submit(context: Context, args: argparse.Namespace) -> None:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(args.socket or default_socket())
+        request = {'argv': args.job}
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        reply = json.loads(client.makefile('rb').readline())
+    print(reply['output'], end='')
+    if reply['status'] != 'ok':
+        sys.exit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Создаёт разбор аргументов со всеми подкомандами
+
+    Returns:
+        argparse.ArgumentParser: разбор аргументов
+    """
+    arg_parser = argparse.ArgumentParser(prog='python -m cli')
+    arg_parser.add_argument('--source', choices=('html', 'api'),
+                            default='html',
+                            help='HTML-страницы или JSON API last.fm')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('crawl-genre',
+                                  help='собрать исполнителей жанра')
+    command.add_argument('genre')
+    command.add_argument('--pages', type=int,
+                         default=LIMITS['ARTISTS_PAGE_LIMIT'])
+    command.set_defaults(handler=crawl_genre)
+
+    command = commands.add_parser('crawl-artist',
+                                  help='собрать альбомы исполнителя')
+    command.add_argument('artist')
+    command.add_argument('--pages', type=int,
+                         default=LIMITS['ARTIST_ALBUMS_PAGE_LIMIT'])
+    command.add_argument('--songs', action='store_true',
+                         help='также собрать песни альбомов')
+    command.set_defaults(handler=crawl_artist)
+
+    command = commands.add_parser('download-media',
+                                  help='скачать аватары и обложки')
+    command.add_argument('--genre')
+    command.add_argument('--artist')
+    command.add_argument('--pages', type=int, default=1)
+    command.set_defaults(handler=download_media)
+
+    command = commands.add_parser('load-db',
+                                  help='загрузить дерево jsons в БД')
+    command.add_argument('root', nargs='?', default='jsons')
+    command.add_argument('--workers', type=int)
+    command.set_defaults(handler=load_db)
+
+    command = commands.add_parser(
+        'build-store', help='собрать локальное хранилище SQLite из jsons')
+    command.add_argument('root', nargs='?', default=INGEST['ROOT'])
+    command.add_argument('--path', default=LOCAL_STORE['PATH'],
+                         help='путь к файлу хранилища')
+    command.set_defaults(handler=build_store)
+
+    command = commands.add_parser(
+        'refresh', help='инкрементально обновить каталог и записать дельту')
+    command.add_argument('genres', nargs='*', default=ENUMS['GENRES'])
+    command.add_argument('--skip-albums', action='store_true',
+                         help='обновить только списки исполнителей')
+    command.set_defaults(handler=refresh)
+
+    command = commands.add_parser('apply-delta',
+                                  help='применить дельту к БД')
+    command.add_argument('path')
+    command.set_defaults(handler=apply_delta)
+
+    command = commands.add_parser('plan', help='оценить объём задания')
+    add_job_arguments(command)
+    command.set_defaults(handler=plan)
+
+    command = commands.add_parser(
+        'schedule', help='собрать данные по популярности исполнителей')
+    add_job_arguments(command)
+    command.add_argument('--budget', type=int,
+                         help='наибольшее количество запросов')
+    command.set_defaults(handler=schedule)
+
+    command = commands.add_parser('daemon',
+                                  help='принимать задания через сокет')
+    command.add_argument('--socket',
+                         help='путь к сокету, по умолчанию в личной папке')
+    command.set_defaults(handler=serve)
+
+    command = commands.add_parser('submit',
+                                  help='отправить задание демону')
+    command.add_argument('--socket',
+                         help='путь к сокету, по умолчанию в личной папке')
+    command.add_argument('job', nargs=argparse.REMAINDER)
+    command.set_defaults(handler=submit)
+    return arg_parser
+
+
+def run_job(context: Context, argv: list[str]) -> tuple[str, str]:
+    """
+    Выполняет задание внутри демона, перехватывая вывод
+
+    Args:
+        context (Context): общее состояние демона
+        argv (list[str]): аргументы команды
+
+    Returns:
+        tuple[str, str]: статус и вывод задания
+    """
+    output = io.StringIO()
+    status = 'ok'
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            args = build_parser().parse_args(argv)
+            if args.handler in (serve, submit):
+                raise ValueError('Команда недоступна внутри демона')
+            context.source = args.source
+            args.handler(context, args)
+        except SystemExit as e:
+            status = 'ok' if e.code in (0, None) else 'error'
+        except Exception as e:
+            print(f'{type(e).__name__}: {e}')
+            status = 'error'
+        finally:
+            context.save()
+    return status, output.getvalue()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Главная функция
+    """
+    args = build_parser().parse_args(argv)
+    if args.handler is not submit:
+        from dotenv import load_dotenv
+        load_dotenv()
+    context = Context()
+    context.source = args.source
+    try:
+        args.handler(context, args)
+    finally:
+        context.save()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+from typing import TypedDict
+
 SELECTORS = {
     'MAX_PAGES': (
         'li',
@@ -24,9 +26,22 @@ SELECTORS = {
     ),
 }
 
+HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/120.0.0.0 Safari/537.36'
+    ),
+}
+
+GENRES_DIR = 'genres'
+
+ARTIST_IMAGES = 'genre_images'
+
 LIMITS = {
     'ARTISTS_PAGE_LIMIT': 2,
     'ARTIST_ALBUMS_PAGE_LIMIT': 2,
+    'PREFETCH_PAGES': 2,
 }
 
 ENUMS = {
@@ -35,3 +50,143 @@ ENUMS = {
         'british', 'punk', '80s',
     ),
 }
+
+class NegativeCacheConfig(TypedDict):
+    PATH: str
+    TTL: int
+    SAVE_EVERY: int
+
+
+NEGATIVE_CACHE: NegativeCacheConfig = {
+    'PATH': 'jsons/negative_cache.json',
+    'TTL': 7 * 24 * 60 * 60,
+    'SAVE_EVERY': 50,
+}
+
+
+class CircuitBreakerConfig(TypedDict):
+    WINDOW: int
+    MIN_REQUESTS: int
+    ERROR_RATE: float
+    COOL_DOWN: float
+    REQUEST_TIMEOUT: float
+
+
+CIRCUIT_BREAKER: CircuitBreakerConfig = {
+    'WINDOW': 20,
+    'MIN_REQUESTS': 5,
+    'ERROR_RATE': 0.5,
+    'COOL_DOWN': 120,
+    'REQUEST_TIMEOUT': 10,
+}
+
+INCREMENTAL = {
+    'STATE_PATH': 'jsons/page_hashes.json',
+    'DELTAS_DIR': 'jsons/deltas',
+}
+
+class IngestConfig(TypedDict):
+    ROOT: str
+    WORKERS: int | None
+    BATCH_SIZE: int
+    FILES_PER_TASK: int
+    TASKS_IN_FLIGHT: int
+
+
+INGEST: IngestConfig = {
+    'ROOT': 'jsons',
+    'WORKERS': None,
+    'BATCH_SIZE': 5000,
+    'FILES_PER_TASK': 16,
+    'TASKS_IN_FLIGHT': 8,
+}
+
+LOCAL_STORE = {
+    'PATH': 'jsons/catalogue.sqlite3',
+}
+
+class ArchiveConfig(TypedDict):
+    ENABLED: bool
+    ROOT: str
+    SEGMENT_SIZE: int
+    LEVEL: int
+    DICT_SIZE: int
+    DICT_SAMPLES: int
+    REEXTRACT_DIR: str
+
+
+ARCHIVE: ArchiveConfig = {
+    'ENABLED': False,
+    'ROOT': 'archive',
+    'SEGMENT_SIZE': 256 * 1024 * 1024,
+    'LEVEL': 9,
+    'DICT_SIZE': 112 * 1024,
+    'DICT_SAMPLES': 200,
+    'REEXTRACT_DIR': 'jsons/reextract',
+}
+
+class LastFmApiConfig(TypedDict):
+    URL: str
+    PAGE_SIZE: int
+    STUB_PORT: int
+    RECORDINGS_DIR: str
+    PLACEHOLDER_IMAGES: tuple[str, ...]
+
+
+LASTFM_API: LastFmApiConfig = {
+    'URL': 'https://ws.audioscrobbler.com/2.0/',
+    'PAGE_SIZE': 50,
+    'STUB_PORT': 8765,
+    'RECORDINGS_DIR': 'recordings',
+    # Хэши изображений-заглушек: звезда вместо фото исполнителя
+    # и пустая обложка альбома
+    'PLACEHOLDER_IMAGES': (
+        '2a96cbd8b46e442fc41c2b86b821562f',
+        'c6f59c1e5e7240a4c0d427abd71f3dbb',
+    ),
+}
+
+class PlannerConfig(TypedDict):
+    PAGE_COUNTS_PATH: str
+    ARTISTS_PER_PAGE: int
+    ALBUMS_PER_PAGE: int
+    GENIUS_MISS_RATE: float
+    PAGE_BYTES: dict[str, int]
+
+
+PLANNER: PlannerConfig = {
+    'PAGE_COUNTS_PATH': 'jsons/page_counts.json',
+    'ARTISTS_PER_PAGE': 21,
+    'ALBUMS_PER_PAGE': 20,
+    'GENIUS_MISS_RATE': 0.3,
+    'PAGE_BYTES': {
+        'listing': 150 * 1024,
+        'genius': 250 * 1024,
+        'album': 200 * 1024,
+        'images': 120 * 1024,
+        'image': 80 * 1024,
+    },
+}
+
+DAEMON = {
+    # Сокет создаётся в личной папке пользователя: $XDG_RUNTIME_DIR
+    # или musicparser-<uid> во временной папке с правами 0700
+    'SOCKET_NAME': 'musicparser.sock',
+}
+
+ASYNC_DB = {
+    'BATCH_SIZE': 1000,
+    'MAX_IN_FLIGHT': 4,
+}
+
+class KeyFilterConfig(TypedDict):
+    BLOOM_THRESHOLD: int
+    ERROR_RATE: float
+    ITERSIZE: int
+
+
+KEY_FILTER: KeyFilterConfig = {
+    'BLOOM_THRESHOLD': 2_000_000,
+    'ERROR_RATE': 0.001,
+    'ITERSIZE': 10_000,
+}
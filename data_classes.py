@@ -1,5 +1,13 @@
-from typing import NamedTuple
+from array import array
+from typing import Iterator, NamedTuple, TextIO
 import datetime
+import json
+
+from normalize import (
+    dates_to_ordinals,
+    durations_to_seconds,
+    seconds_to_time,
+)
 
 
 DATE_FORMAT = '%Y-%m-%d'
@@ -51,6 +59,34 @@ class Song(NamedTuple):
         }
 
 
+class ArtistURL(NamedTuple):
+    """
+    Класс ссылки на изображение исполнителя
+    """
+    username: str
+    url: str
+
+    def to_dict(self):
+        return {
+            'username': self.username,
+            'url': self.url
+        }
+
+
+class AlbumURL(NamedTuple):
+    """
+    Класс ссылки на обложку альбома
+    """
+    title: str
+    url: str
+
+    def to_dict(self):
+        return {
+            'title': self.title,
+            'url': self.url
+        }
+
+
 class Genre(NamedTuple):
     """
     Класс сущности <<Жанр>>
@@ -65,6 +101,110 @@ class Genre(NamedTuple):
         }
 
 
+class SongBatch:
+    """
+    Компактная коллекция песен: названия хранятся списком,
+    длительности в секундах - массивом
+    """
+    __slots__ = ('names', 'seconds')
+
+    def __init__(self, names: list[str] | None = None,
+                 seconds: array | None = None):
+        self.names = names if names is not None else []
+        self.seconds = seconds if seconds is not None else array('i')
+
+    @classmethod
+    def from_raw(cls, names: list[str], raw_durations: list[str]):
+        return cls(list(names), durations_to_seconds(raw_durations))
+
+    def append(self, song: Song) -> None:
+        self.names.append(song.name)
+        duration = song.duration
+        self.seconds.append(
+            duration.hour * 3600 + duration.minute * 60 + duration.second)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[Song]:
+        for name, seconds in zip(self.names, self.seconds):
+            yield Song(name, seconds_to_time(seconds))
+
+    def to_dicts(self) -> list[dict]:
+        """
+        Возвращает песни в формате Song.to_dict() для дельт и отчётов
+        """
+        return [song.to_dict() for song in self]
+
+    def dump(self, file: TextIO) -> None:
+        """
+        Записывает песни в JSON в формате Song.to_dict()
+        без промежуточных словарей
+        """
+        file.write('[')
+        for index, (name, seconds) in enumerate(
+                zip(self.names, self.seconds)):
+            if index:
+                file.write(', ')
+            file.write(
+                f'{{"name": {json.dumps(name)}, "duration": '
+                f'"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:'
+                f'{seconds % 60:02d}"}}'
+            )
+        file.write(']')
+
+
+class AlbumBatch:
+    """
+    Компактная коллекция альбомов: даты публикации хранятся
+    массивом порядковых номеров дней
+    """
+    __slots__ = ('names', 'ordinals', 'covers')
+
+    def __init__(self, names: list[str] | None = None,
+                 ordinals: array | None = None,
+                 covers: list[str] | None = None):
+        self.names = names if names is not None else []
+        self.ordinals = ordinals if ordinals is not None else array('i')
+        self.covers = covers if covers is not None else []
+
+    @classmethod
+    def from_raw(cls, names: list[str], raw_dates: list[str],
+                 covers: list[str]):
+        return cls(list(names), dates_to_ordinals(raw_dates), list(covers))
+
+    def append(self, album: Album) -> None:
+        self.names.append(album.name)
+        self.ordinals.append(album.publication_date.toordinal())
+        self.covers.append(album.cover_path)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[Album]:
+        for name, ordinal, cover in zip(self.names, self.ordinals,
+                                        self.covers):
+            yield Album(name, datetime.date.fromordinal(ordinal), cover)
+
+    def dump(self, file: TextIO) -> None:
+        """
+        Записывает альбомы в JSON в формате Album.to_dict()
+        без промежуточных словарей
+        """
+        file.write('[')
+        for index, (name, ordinal, cover) in enumerate(
+                zip(self.names, self.ordinals, self.covers)):
+            if index:
+                file.write(', ')
+            publication_date = datetime.date.fromordinal(ordinal)
+            file.write(
+                f'{{"name": {json.dumps(name)}, "publication_date": '
+                f'"{publication_date.isoformat()}", '
+                f'"cover": {json.dumps(cover)}}}'
+            )
+        file.write(']')
+
+
 if __name__ == '__main__':
     song = Song(
         name='blabla',
@@ -1,14 +1,19 @@
-from dotenv import load_dotenv
-from psycopg2 import connect
-from psycopg2 import (
-    OperationalError,
-)
+from glob import glob
+from typing import Iterator
 import json
 import time
 import os
 
+from config import KEY_FILTER
+from key_filter import KeyFilter
 
-load_dotenv()
+
+def prepare_artist(username: str, description: str, avatar: str):
+    media_folder = os.getenv('RELATIVE_MEDIA_FOLDER', '')
+    avatar = os.path.join(media_folder, avatar)
+    if description != 'No description needed.':
+        description = description[:description.find('.') + 1]
+    return username, description, avatar
 
 
 class DatabaseManager:
@@ -21,6 +26,10 @@ class DatabaseManager:
         self.schema_name = os.getenv('SCHEMA_NAME')
 
     def __enter__(self):
+        # psycopg2 нужен только для подключения: prepare_artist
+        # используется и при разборе без базы данных
+        from psycopg2 import connect, OperationalError
+
         try:
             self.connection = connect(
                 dbname=self.name,
@@ -63,11 +72,40 @@ class DatabaseManager:
             songs = cursor.fetchall()
         return songs
 
+    def estimate_rows(self, table: str) -> int:
+        estimate_query = '''
+            SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass;
+        '''
+        with self.connection.cursor() as cursor:
+            cursor.execute(estimate_query, (f'{self.schema_name}.{table}',))
+            return max(cursor.fetchone()[0], 0)
+
+    def stream_rows(self, query: str) -> Iterator[tuple]:
+        with self.connection.cursor(name='stream_rows') as cursor:
+            cursor.itersize = KEY_FILTER['ITERSIZE']
+            cursor.execute(query)
+            yield from cursor
+
+    def find_artists(self, usernames: list[str]) -> set[str]:
+        artists_query = f'''
+            SELECT username FROM {self.schema_name}.artist_artist
+            WHERE username = ANY(%s);
+        '''
+        with self.connection.cursor() as cursor:
+            cursor.execute(artists_query, (usernames,))
+            return {row[0] for row in cursor.fetchall()}
+
+    def existing_artists(self) -> KeyFilter:
+        keys = KeyFilter(self.estimate_rows('artist_artist'),
+                         self.find_artists)
+        artists_query = f'SELECT username FROM {self.schema_name}.artist_artist;'
+        for (username,) in self.stream_rows(artists_query):
+            keys.add(username)
+        return keys
+
     def insert_artist(self, username: str, description: str, avatar: str):
-        media_folder = os.getenv('RELATIVE_MEDIA_FOLDER')
-        avatar = os.path.join(media_folder, avatar)
-        if description != 'No description needed.':
-            description = description[:description.find('.') + 1]
+        username, description, avatar = prepare_artist(
+            username, description, avatar)
         artist_query = '''
             INSERT INTO public.artist_artist(username, description, avatar)
 	        VALUES (%s, %s, %s);
@@ -86,13 +124,18 @@ class DatabaseManager:
 
 
 def main():
+    from dotenv import load_dotenv
+    load_dotenv()
     genre = '80s'
     print('Входим в контекстный менеджер!')
     with DatabaseManager() as dr:
-        with open(f'jsons/artists/{genre}.json', 'r', encoding='utf-8') as file:
-            data: list[dict] = json.load(file)
-        for item in data:
-            dr.insert_artist(*item.values())
+        existing = dr.existing_artists()
+        for path in sorted(glob(f'jsons/artists/{genre}/page=*.json')):
+            with open(path, 'r', encoding='utf-8') as file:
+                data: list[dict] = json.load(file)
+            for item in existing.new_rows(data, lambda item: item['username']):
+                dr.insert_artist(
+                    item['username'], item['description'], item['avatar'])
     print('Вышли из контекстного менеджера!')
 
 
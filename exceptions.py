@@ -0,0 +1,25 @@
+class GenreError(Exception):
+    """
+    Жанр отсутствует на сайте
+    """
+
+
+class PageNumberError(Exception):
+    """
+    Номер страницы выходит за допустимые границы
+    """
+
+
+class CircuitOpenError(Exception):
+    """
+    Запросы к хосту временно приостановлены предохранителем
+    """
+    def __init__(self, host: str):
+        super().__init__(f'Запросы к "{host}" временно приостановлены')
+        self.host = host
+
+
+class LastFmApiError(Exception):
+    """
+    Ошибка, возвращённая JSON API last.fm
+    """
@@ -0,0 +1,244 @@
+from collections import defaultdict
+from typing import BinaryIO, Iterator, TextIO
+from urllib.parse import urlsplit, unquote
+import json
+import os
+import threading
+import time
+
+import zstandard as zstd
+
+from config import ARCHIVE
+
+
+def classify_url(url: str) -> str:
+    """
+    Определяет тип страницы по её URL-адресу
+
+    Args:
+        url (str): URL-адрес страницы
+
+    Returns:
+        str: тип страницы
+    """
+    parts = urlsplit(url)
+    path = [unquote(part) for part in parts.path.split('/') if part]
+    if parts.netloc == 'genius.com':
+        return 'genius_artist'
+    if path[1:2] == ['tag']:
+        return 'genre_artists'
+    if path[1:] == ['music']:
+        return 'genres'
+    if len(path) == 4 and path[3] == '+images':
+        return 'artist_images'
+    if len(path) == 4 and path[3] == '+albums':
+        return 'artist_albums'
+    if len(path) == 4:
+        return 'album'
+    if len(path) == 5 and path[4] == '+images':
+        return 'album_images'
+    if len(path) == 6 and path[4] == '+images':
+        return 'album_image'
+    return 'other'
+
+
+class HtmlArchive:
+    """
+    Архив загруженных HTML-страниц: страницы сжимаются zstd
+    со словарём, обученным отдельно для каждого типа страниц,
+    и дописываются в большие файлы-сегменты, а смещения
+    хранятся в индексе
+    """
+
+    def __init__(self, root: str = ARCHIVE['ROOT']):
+        self.root = root
+        self.dicts_dir = os.path.join(root, 'dicts')
+        os.makedirs(self.dicts_dir, exist_ok=True)
+        self.index_path = os.path.join(root, 'index.jsonl')
+        self.entries: dict[str, dict] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    entry = json.loads(line)
+                    self.entries[entry['url']] = entry
+        self.dicts: dict[str, zstd.ZstdCompressionDict] = {}
+        for name in os.listdir(self.dicts_dir):
+            with open(os.path.join(self.dicts_dir, name), 'rb') as file:
+                self.dicts[os.path.splitext(name)[0]] = \
+                    zstd.ZstdCompressionDict(file.read())
+        self.samples: dict[str, list[bytes]] = defaultdict(list)
+        self.compressors: dict[str, zstd.ZstdCompressor] = {}
+        self.decompressors: dict[str, zstd.ZstdDecompressor] = {}
+        self.readers: dict[str, BinaryIO] = {}
+        self.lock = threading.Lock()
+        self.segment_number = len(self.segments())
+        self.segment_file: BinaryIO | None = None
+        self.index_file: TextIO | None = None
+
+    def segments(self) -> list[str]:
+        """
+        Возвращает имена файлов-сегментов архива
+
+        Returns:
+            list[str]: имена сегментов по порядку
+        """
+        return sorted(name for name in os.listdir(self.root)
+                      if name.startswith('segment-'))
+
+    def segment_name(self, number: int) -> str:
+        return f'segment-{number:05d}.zst'
+
+    def train_dictionary(self, page_type: str) -> None:
+        """
+        Обучает словарь zstd на накопленных страницах данного типа
+
+        Args:
+            page_type (str): тип страницы
+
+        Returns:
+            None
+        """
+        samples = self.samples.pop(page_type)
+        try:
+            zdict = zstd.train_dictionary(ARCHIVE['DICT_SIZE'], list(samples))
+        except zstd.ZstdError as e:
+            print(f'Словарь для "{page_type}" не обучен: {e}')
+            return
+        with open(os.path.join(self.dicts_dir, f'{page_type}.zdict'),
+                  'wb') as file:
+            file.write(zdict.as_bytes())
+        self.dicts[page_type] = zdict
+        self.compressors.pop(page_type, None)
+        print(f'Словарь для "{page_type}" обучен на {len(samples)} страницах')
+
+    def compressor(self, page_type: str) -> zstd.ZstdCompressor:
+        if page_type not in self.compressors:
+            self.compressors[page_type] = zstd.ZstdCompressor(
+                level=ARCHIVE['LEVEL'], dict_data=self.dicts.get(page_type))
+        return self.compressors[page_type]
+
+    def decompressor(self, page_type: str | None) -> zstd.ZstdDecompressor:
+        # Страницы, сжатые без словаря, хранятся под пустым ключом
+        key = page_type or ''
+        if key not in self.decompressors:
+            self.decompressors[key] = zstd.ZstdDecompressor(
+                dict_data=self.dicts[key] if key else None)
+        return self.decompressors[key]
+
+    def put(self, url: str, status_code: int, content: bytes) -> None:
+        """
+        Сжимает страницу и дописывает её в текущий сегмент архива
+
+        Args:
+            url (str): URL-адрес страницы
+            status_code (int): код ответа сервера
+            content (bytes): тело ответа
+
+        Returns:
+            None
+        """
+        page_type = classify_url(url)
+        with self.lock:
+            if page_type not in self.dicts:
+                self.samples[page_type].append(content)
+                if len(self.samples[page_type]) >= ARCHIVE['DICT_SAMPLES']:
+                    self.train_dictionary(page_type)
+            data = self.compressor(page_type).compress(content)
+            segment_file = self.segment_file
+            if (segment_file is None
+                    or segment_file.tell() + len(data)
+                    > ARCHIVE['SEGMENT_SIZE']):
+                segment_file = self.open_next_segment()
+            offset = segment_file.tell()
+            segment_file.write(data)
+            segment_file.flush()
+            entry = {
+                'url': url,
+                'type': page_type,
+                'status': status_code,
+                'segment': self.segment_name(self.segment_number),
+                'offset': offset,
+                'length': len(data),
+                'size': len(content),
+                'dict': page_type if page_type in self.dicts else None,
+                'fetched_at': time.time(),
+            }
+            index_file = self.index_file
+            if index_file is None:
+                index_file = self.index_file = open(
+                    self.index_path, 'a', encoding='utf-8')
+            index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            index_file.flush()
+            self.entries[url] = entry
+
+    def open_next_segment(self) -> BinaryIO:
+        if self.segment_file is not None:
+            self.segment_file.close()
+        self.segment_number += 1
+        path = os.path.join(self.root, self.segment_name(self.segment_number))
+        self.segment_file = open(path, 'ab')
+        return self.segment_file
+
+    def read(self, entry: dict) -> bytes:
+        """
+        Возвращает распакованное содержимое записи архива
+
+        Args:
+            entry (dict): запись индекса
+
+        Returns:
+            bytes: тело ответа
+        """
+        reader = self.readers.get(entry['segment'])
+        if reader is None:
+            reader = open(os.path.join(self.root, entry['segment']), 'rb')
+            self.readers[entry['segment']] = reader
+        reader.seek(entry['offset'])
+        data = reader.read(entry['length'])
+        return self.decompressor(entry['dict']).decompress(data)
+
+    def get(self, url: str) -> dict | None:
+        """
+        Возвращает последнюю запись индекса для URL-адреса
+
+        Args:
+            url (str): URL-адрес страницы
+
+        Returns:
+            dict | None: запись индекса или None
+        """
+        return self.entries.get(url)
+
+    def iter_entries(self) -> Iterator[dict]:
+        return iter(self.entries.values())
+
+    def stats(self) -> dict:
+        """
+        Возвращает размер архива на диске и степень сжатия
+
+        Returns:
+            dict: количество страниц, исходный и занимаемый объём
+        """
+        stored = sum(
+            os.path.getsize(os.path.join(self.root, name))
+            for name in self.segments()
+        )
+        stored += sum(
+            os.path.getsize(os.path.join(self.dicts_dir, name))
+            for name in os.listdir(self.dicts_dir)
+        )
+        stored += os.path.getsize(self.index_path) \
+            if os.path.exists(self.index_path) else 0
+        raw = sum(entry['size'] for entry in self.entries.values())
+        return {
+            'pages': len(self.entries),
+            'raw_bytes': raw,
+            'stored_bytes': stored,
+            'ratio': raw / stored if stored else 0.0,
+        }
+
+    def close(self) -> None:
+        for file in (self.segment_file, self.index_file,
+                     *self.readers.values()):
+            if file is not None:
+                file.close()
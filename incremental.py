@@ -0,0 +1,272 @@
+from datetime import datetime
+import hashlib
+import itertools
+import json
+import os
+
+from config import LIMITS, INCREMENTAL
+from data_classes import Artist, Album
+from parser import MusicParser
+
+
+def content_hash(items: list) -> str:
+    """
+    Возвращает хэш извлечённого содержимого страницы
+
+    Args:
+        items (list): данные, извлечённые со страницы
+
+    Returns:
+        str: SHA-256 хэш в шестнадцатеричном виде
+    """
+    raw = json.dumps(items, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def empty_delta() -> dict:
+    """
+    Возвращает пустую дельту изменений каталога
+
+    Returns:
+        dict: дельта с пустыми списками new/changed/removed;
+        memberships - принадлежность исполнителей жанрам
+    """
+    return {
+        entity: {'new': [], 'changed': [], 'removed': []}
+        for entity in ('artists', 'memberships', 'albums', 'songs')
+    }
+
+
+class PageHashStore:
+    """
+    Хранилище хэшей и содержимого ранее собранных страниц
+    """
+
+    def __init__(self, path: str = INCREMENTAL['STATE_PATH']):
+        self.path = path
+        self.pages: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self.pages = json.load(file)
+
+    def get(self, key: str) -> dict | None:
+        """
+        Возвращает сохранённое состояние страницы
+
+        Args:
+            key (str): ключ страницы
+
+        Returns:
+            dict | None: хэш и содержимое страницы или None
+        """
+        return self.pages.get(key)
+
+    def put(self, key: str, items: list) -> bool:
+        """
+        Сохраняет содержимое страницы
+
+        Args:
+            key (str): ключ страницы
+            items (list): данные, извлечённые со страницы
+
+        Returns:
+            bool: True, если содержимое изменилось
+        """
+        digest = content_hash(items)
+        previous = self.pages.get(key)
+        self.pages[key] = {'hash': digest, 'items': items}
+        return previous is None or previous['hash'] != digest
+
+    def remove(self, key: str) -> None:
+        """
+        Удаляет состояние страницы, которой больше нет на сайте
+
+        Args:
+            key (str): ключ страницы
+
+        Returns:
+            None
+        """
+        self.pages.pop(key, None)
+
+    def save(self) -> None:
+        """
+        Атомарно записывает хранилище в JSON-файл
+
+        Returns:
+            None
+        """
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.pages, file, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class IncrementalCrawler:
+    """
+    Инкрементальное обновление каталога: повторно извлекает
+    только изменившиеся страницы списков и новые альбомы
+    и формирует дельту изменений
+    """
+
+    def __init__(self, parser: MusicParser | None = None,
+                 store: PageHashStore | None = None):
+        self.parser = parser or MusicParser()
+        self.store = store or PageHashStore()
+        self.delta = empty_delta()
+        self.new_artists: set[str] = set()
+
+    def stored_artists(self, genre: str | None = None) -> set[str]:
+        """
+        Возвращает исполнителей со всех сохранённых страниц жанра,
+        а если жанр не указан - всех жанров
+
+        Args:
+            genre (str | None): название жанра
+
+        Returns:
+            set[str]: никнеймы исполнителей
+        """
+        prefix = f'artists/{genre}/' if genre else 'artists/'
+        artists = set()
+        for key, state in self.store.pages.items():
+            if key.startswith(prefix):
+                artists.update(state['items'])
+        return artists
+
+    def refresh_genre(self, genre: str) -> None:
+        """
+        Обновляет исполнителей жанра по страницам списка.
+        Новыми считаются исполнители, не встречавшиеся ни в одном жанре.
+        Исполнители не удаляются: из жанра выбывают только те, кого нет
+        во всём списке, и только если список просмотрен до конца
+
+        Args:
+            genre (str): название жанра
+
+        Returns:
+            None
+        """
+        known_anywhere = self.stored_artists()
+        known_in_genre = self.stored_artists(genre)
+        current: set[str] = set()
+        last_page = 0
+        pages = self.parser.iter_paginated_artists_by_genre(genre)
+        for page, artists in pages:
+            last_page = page
+            current.update(artists)
+            key = f'artists/{genre}/page={page}'
+            if not self.store.put(key, artists):
+                print(f'Artists of genre "{genre}" from page {page} '
+                      f'are unchanged')
+                continue
+            for artist in artists:
+                if (artist not in known_anywhere
+                        and artist not in self.new_artists):
+                    self.new_artists.add(artist)
+                    description = self.parser.get_artist_description(artist)
+                    self.delta['artists']['new'].append(
+                        Artist(artist, f'{artist}.jpg', description).to_dict()
+                    )
+                if artist not in known_in_genre:
+                    known_in_genre.add(artist)
+                    self.delta['memberships']['new'].append(
+                        {'username': artist, 'genre': genre})
+        # Исполнитель за пределами лимита страниц из жанра не выбывал
+        if last_page < LIMITS['ARTISTS_PAGE_LIMIT']:
+            for page in range(last_page + 1,
+                              LIMITS['ARTISTS_PAGE_LIMIT'] + 1):
+                self.store.remove(f'artists/{genre}/page={page}')
+            for artist in known_in_genre - current:
+                self.delta['memberships']['removed'].append(
+                    {'username': artist, 'genre': genre})
+
+    def known_albums(self, artist: str) -> set[str]:
+        """
+        Возвращает все ранее собранные альбомы исполнителя
+
+        Args:
+            artist (str): никнейм исполнителя
+
+        Returns:
+            set[str]: названия альбомов
+        """
+        state = self.store.get(f'albums/{artist}')
+        return set(state['items']) if state else set()
+
+    def refresh_artist(self, artist: str) -> None:
+        """
+        Добавляет новые альбомы исполнителя. Новые альбомы ищутся
+        на первой странице популярных альбомов: если на ней нет
+        неизвестных альбомов, остальные страницы не запрашиваются.
+        Порядок альбомов на странице изменением не считается, а уже
+        известные альбомы повторно не загружаются
+
+        Args:
+            artist (str): никнейм исполнителя
+
+        Returns:
+            None
+        """
+        known = self.known_albums(artist)
+        titles = self.parser.get_artist_albums(artist, 1)
+        if not set(titles) - known:
+            print(f'"{artist}`s" most popular albums are unchanged')
+            return
+        seen: set[str] = set()
+        last_page = 0
+        # Следующие страницы загружаются в фоне
+        pages = self.parser.iter_artist_albums(artist, first_page=2)
+        for page, titles in itertools.chain([(1, titles)], pages):
+            last_page = page
+            for title in titles:
+                if title not in known and title not in seen:
+                    self.add_album(artist, title)
+                seen.add(title)
+        # Альбом за пределами лимита страниц не считается удалённым
+        if last_page < LIMITS['ARTIST_ALBUMS_PAGE_LIMIT']:
+            for title in known - seen:
+                self.delta['albums']['removed'].append(
+                    {'artist': artist, 'name': title})
+            known = seen
+        else:
+            known |= seen
+        self.store.put(f'albums/{artist}', sorted(known))
+
+    def add_album(self, artist: str, title: str) -> None:
+        """
+        Добавляет новый альбом и его песни в дельту
+
+        Args:
+            artist (str): никнейм исполнителя
+            title (str): название альбома
+
+        Returns:
+            None
+        """
+        publication_date = self.parser.get_publication_date(artist, title)
+        cover_path = f'{title}.jpg'
+        album = Album(title, publication_date, cover_path).to_dict()
+        self.delta['albums']['new'].append({'artist': artist, **album})
+        songs = self.parser.get_album_songs(artist, title).to_dicts()
+        self.delta['songs']['new'].append(
+            {'artist': artist, 'album': title, 'songs': songs})
+
+    def write_delta(self) -> str:
+        """
+        Записывает дельту в JSON-файл и сохраняет хэши страниц
+
+        Returns:
+            str: путь к файлу дельты
+        """
+        os.makedirs(INCREMENTAL['DELTAS_DIR'], exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(INCREMENTAL['DELTAS_DIR'], f'{stamp}.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.delta, file, ensure_ascii=False)
+        self.store.save()
+        print(f'Delta was dumped into "{path}"')
+        return path
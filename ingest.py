@@ -0,0 +1,524 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterator
+import argparse
+import json
+import os
+import time
+
+import ijson
+
+from config import INGEST
+from db_manager import prepare_artist
+from key_filter import KeyFilter
+from utils import sanitize_filename
+
+if TYPE_CHECKING:
+    from db_manager import DatabaseManager
+
+
+def collect_files(root: str, kind: str) -> list[str]:
+    """
+    Возвращает все JSON-файлы раздела дерева jsons
+
+    Args:
+        root (str): корень дерева
+        kind (str): раздел, "artists", "albums" или "songs"
+
+    Returns:
+        list[str]: пути к файлам
+    """
+    paths: list[str] = []
+    for folder, _, files in os.walk(os.path.join(root, kind)):
+        paths.extend(os.path.join(folder, name)
+                     for name in files if name.endswith('.json'))
+    return sorted(paths)
+
+
+def owner_name(path: str) -> str:
+    """
+    Возвращает название папки, в которой лежит файл,
+    т.е. никнейм исполнителя для альбомов и песен
+
+    Args:
+        path (str): путь к файлу
+
+    Returns:
+        str: название папки
+    """
+    return os.path.basename(os.path.dirname(path))
+
+
+def read_artists(path: str) -> list[tuple]:
+    """
+    Потоково разбирает файл со страницей исполнителей
+    """
+    with open(path, 'rb') as file:
+        return [prepare_artist(item['username'], item['description'],
+                               item['avatar'])
+                for item in ijson.items(file, 'item')]
+
+
+def read_albums(path: str) -> list[tuple]:
+    """
+    Потоково разбирает файл со страницей альбомов исполнителя
+    """
+    artist = owner_name(path)
+    with open(path, 'rb') as file:
+        return [(artist, item['name'], item['publication_date'],
+                 item['cover'])
+                for item in ijson.items(file, 'item')]
+
+
+def read_songs(path: str) -> list[tuple]:
+    """
+    Потоково разбирает файл с песнями альбома
+    """
+    artist = owner_name(path)
+    album = os.path.splitext(os.path.basename(path))[0]
+    with open(path, 'rb') as file:
+        return [(artist, album, item['name'], item['duration'])
+                for item in ijson.items(file, 'item')]
+
+
+def read_files(reader: Callable[[str], list[tuple]],
+               paths: list[str]) -> list[tuple]:
+    """
+    Разбирает несколько файлов одной задачей пула
+    """
+    rows = []
+    for path in paths:
+        rows.extend(reader(path))
+    return rows
+
+
+def stream_batches(executor: Executor, reader: Callable[[str], list[tuple]],
+                   paths: list[str], batch_size: int,
+                   files_per_task: int = INGEST['FILES_PER_TASK'],
+                   in_flight: int = INGEST['TASKS_IN_FLIGHT']
+                   ) -> Iterator[list[tuple]]:
+    """
+    Разбирает файлы в параллельных процессах и возвращает
+    строки пачками фиксированного размера. Одновременно в пуле
+    не больше in_flight задач, поэтому разобранные, но ещё
+    не записанные строки не накапливаются в памяти
+
+    Args:
+        executor (Executor): пул процессов
+        reader (Callable[[str], list[tuple]]): функция разбора файла
+        paths (list[str]): пути к файлам
+        batch_size (int): размер пачки
+        files_per_task (int): количество файлов в одной задаче
+        in_flight (int): количество одновременно выполняемых задач
+
+    Returns:
+        Iterator[list[tuple]]: пачки строк
+    """
+    chunks = (paths[start:start + files_per_task]
+              for start in range(0, len(paths), files_per_task))
+    pending: deque[Future] = deque()
+    batch: list[tuple] = []
+    try:
+        while True:
+            while len(pending) < in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(executor.submit(read_files, reader, chunk))
+            if not pending:
+                break
+            batch.extend(pending.popleft().result())
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+    finally:
+        for future in pending:
+            future.cancel()
+    if batch:
+        yield batch
+
+
+class Ingestor:
+    """
+    Загрузка всего дерева jsons в базу данных: исполнители,
+    альбомы и песни. Внешние ключи разрешаются через словари
+    идентификаторов в памяти
+    """
+
+    def __init__(self, db: 'DatabaseManager | None',
+                 workers: int | None = INGEST['WORKERS'],
+                 batch_size: int = INGEST['BATCH_SIZE']):
+        self.db = db
+        self.workers = workers
+        self.batch_size = batch_size
+        self.artist_ids: dict[str, int] = {}
+        self.album_ids: dict[tuple[str, str], int] = {}
+        self.song_keys = KeyFilter(0)
+        self.rows = 0
+        self.skipped = 0
+
+    def warm_existing_keys(self) -> None:
+        """
+        Потоково загружает ключи уже существующих строк: идентификаторы
+        исполнителей и альбомов и ключи песен, чтобы повторные
+        записи отбрасывались до отправки на сервер
+
+        Returns:
+            None
+        """
+        schema = self.schema
+        self.artist_ids.update(self.database.stream_rows(
+            f'SELECT username, id FROM {schema}.artist_artist;'))
+        query = (f'SELECT artist.username, album.name, album.id '
+                 f'FROM {schema}.albums_album AS album '
+                 f'JOIN {schema}.artist_artist AS artist '
+                 f'ON artist.id = album.artist_id;')
+        for artist, name, album_id in self.database.stream_rows(query):
+            self.album_ids[(artist, sanitize_filename(name))] = album_id
+        self.song_keys = KeyFilter(self.database.estimate_rows('song_song'),
+                                   self.find_songs)
+        query = f'SELECT album_id, name FROM {schema}.song_song;'
+        for album_id, name in self.database.stream_rows(query):
+            self.song_keys.add((album_id, name))
+
+    def find_songs(self, keys: list[tuple[int, str]]) -> set[tuple[int, str]]:
+        """
+        Проверяет, какие из песен уже есть в базе данных
+
+        Args:
+            keys (list[tuple[int, str]]): идентификаторы альбомов и названия
+
+        Returns:
+            set[tuple[int, str]]: существующие ключи
+        """
+        query = (f'SELECT song.album_id, song.name '
+                 f'FROM {self.schema}.song_song AS song '
+                 f'JOIN unnest(%s::int[], %s::text[]) AS key(album_id, name) '
+                 f'ON key.album_id = song.album_id AND key.name = song.name;')
+        with self.database.connection.cursor() as cursor:
+            cursor.execute(query, ([key[0] for key in keys],
+                                   [key[1] for key in keys]))
+            return set(cursor.fetchall())
+
+    def write_batch(self, query: str, rows: list[tuple]) -> list[int]:
+        """
+        Записывает пачку строк одной транзакцией
+
+        Args:
+            query (str): запрос INSERT ... VALUES %s RETURNING id
+            rows (list[tuple]): строки
+
+        Returns:
+            list[int]: идентификаторы вставленных строк
+        """
+        self.rows += len(rows)
+        if self.db is None:
+            return list(range(self.rows - len(rows), self.rows))
+        from psycopg2.extras import execute_values
+
+        with self.db.connection.cursor() as cursor:
+            ids = execute_values(cursor, query, rows,
+                                 page_size=self.batch_size, fetch=True)
+        self.db.connection.commit()
+        return [row[0] for row in ids]
+
+    def write_artists(self, batch: list[tuple]) -> None:
+        """
+        Записывает исполнителей, которых ещё нет в базе данных
+
+        Args:
+            batch (list[tuple]): никнейм, описание и аватар
+
+        Returns:
+            None
+        """
+        query = (f'INSERT INTO {self.schema}.artist_artist'
+                 f'(username, description, avatar) VALUES %s RETURNING id;')
+        rows = []
+        for row in batch:
+            # Исполнители повторяются в разных жанрах
+            if row[0] not in self.artist_ids:
+                self.artist_ids[row[0]] = -1
+                rows.append(row)
+        if rows:
+            ids = self.write_batch(query, rows)
+            self.artist_ids.update(
+                (row[0], _id) for row, _id in zip(rows, ids))
+
+    def write_albums(self, batch: list[tuple]) -> None:
+        """
+        Записывает альбомы, которых ещё нет в базе данных
+
+        Args:
+            batch (list[tuple]): исполнитель, название, дата публикации
+            и обложка
+
+        Returns:
+            None
+        """
+        query = (f'INSERT INTO {self.schema}.albums_album'
+                 f'(name, publication_date, cover, artist_id) '
+                 f'VALUES %s RETURNING id;')
+        keys, rows = [], []
+        for artist, name, publication_date, cover in batch:
+            artist_id = self.artist_ids.get(artist)
+            key = (artist, sanitize_filename(name))
+            if artist_id is None or key in self.album_ids:
+                self.skipped += 1
+                continue
+            # Повтор альбома на другой странице в этом же запуске
+            self.album_ids[key] = -1
+            keys.append(key)
+            rows.append((name, publication_date, cover, artist_id))
+        if rows:
+            ids = self.write_batch(query, rows)
+            self.album_ids.update(zip(keys, ids))
+
+    def write_songs(self, batch: list[tuple],
+                    skip_existing: bool = True) -> None:
+        """
+        Записывает песни альбомов
+
+        Args:
+            batch (list[tuple]): исполнитель, название файла альбома,
+            название песни и длительность
+            skip_existing (bool): отбрасывать уже записанные песни
+
+        Returns:
+            None
+        """
+        query = (f'INSERT INTO {self.schema}.song_song'
+                 f'(name, duration, album_id) VALUES %s RETURNING id;')
+        rows = []
+        for artist, album, name, duration in batch:
+            album_id = self.album_ids.get((artist, album))
+            if album_id is None:
+                self.skipped += 1
+                continue
+            rows.append((name, duration, album_id))
+        new_rows = rows
+        if skip_existing:
+            new_rows = self.song_keys.new_rows(
+                rows, lambda row: (row[2], row[0]))
+        self.skipped += len(rows) - len(new_rows)
+        if new_rows:
+            self.write_batch(query, new_rows)
+
+    def load_artists(self, executor: Executor, paths: list[str]) -> None:
+        for batch in stream_batches(executor, read_artists, paths,
+                                    self.batch_size):
+            self.write_artists(batch)
+
+    def load_albums(self, executor: Executor, paths: list[str]) -> None:
+        for batch in stream_batches(executor, read_albums, paths,
+                                    self.batch_size):
+            self.write_albums(batch)
+
+    def load_songs(self, executor: Executor, paths: list[str]) -> None:
+        for batch in stream_batches(executor, read_songs, paths,
+                                    self.batch_size):
+            self.write_songs(batch)
+
+    def delete_songs(self, album_ids: list[int]) -> None:
+        """
+        Удаляет все песни альбомов
+
+        Args:
+            album_ids (list[int]): идентификаторы альбомов
+
+        Returns:
+            None
+        """
+        query = (f'DELETE FROM {self.schema}.song_song '
+                 f'WHERE album_id = ANY(%s);')
+        with self.database.connection.cursor() as cursor:
+            cursor.execute(query, (album_ids,))
+        self.database.connection.commit()
+
+    def delete_albums(self, keys: list[tuple[str, str]]) -> None:
+        """
+        Удаляет альбомы вместе с их песнями
+
+        Args:
+            keys (list[tuple[str, str]]): исполнители и названия
+            файлов альбомов
+
+        Returns:
+            None
+        """
+        album_ids = [self.album_ids.pop(key) for key in keys
+                     if key in self.album_ids]
+        if not album_ids:
+            return
+        # Внешние ключи Django не удаляют песни каскадно на стороне БД
+        self.delete_songs(album_ids)
+        query = (f'DELETE FROM {self.schema}.albums_album '
+                 f'WHERE id = ANY(%s);')
+        with self.database.connection.cursor() as cursor:
+            cursor.execute(query, (album_ids,))
+        self.database.connection.commit()
+
+    def apply_delta(self, path: str) -> None:
+        """
+        Применяет дельту инкрементального обновления: добавляет
+        исполнителей, альбомы и песни, заменяет песни изменившихся
+        альбомов и удаляет исчезнувшие альбомы. Исполнители
+        не удаляются, а принадлежность жанрам в базе данных
+        не хранится
+
+        Args:
+            path (str): путь к файлу дельты
+
+        Returns:
+            None
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            delta: dict = json.load(file)
+        self.warm_existing_keys()
+        self.write_artists([
+            prepare_artist(item['username'], item['description'],
+                           item['avatar'])
+            for item in delta['artists']['new']])
+        self.delete_albums([
+            (item['artist'], sanitize_filename(item['name']))
+            for item in delta['albums']['removed']])
+        self.write_albums([
+            (item['artist'], item['name'], item['publication_date'],
+             item['cover'])
+            for item in delta['albums']['new']])
+        changed = delta['songs']['changed']
+        album_ids = [
+            self.album_ids[key] for key in
+            ((item['artist'], sanitize_filename(item['album']))
+             for item in changed)
+            if key in self.album_ids]
+        if album_ids:
+            self.delete_songs(album_ids)
+        self.write_songs(self.delta_songs(changed), skip_existing=False)
+        self.write_songs(self.delta_songs(delta['songs']['new']))
+        memberships = delta['memberships']
+        if memberships['new'] or memberships['removed']:
+            print(f'Изменений жанров исполнителей: '
+                  f'{len(memberships["new"]) + len(memberships["removed"])}'
+                  f', в базе данных жанры исполнителей не хранятся')
+        print(f'Дельта "{path}" применена: строк {self.rows}, '
+              f'пропущено {self.skipped}')
+
+    @staticmethod
+    def delta_songs(items: list[dict]) -> list[tuple]:
+        return [(item['artist'], sanitize_filename(item['album']),
+                 song['name'], song['duration'])
+                for item in items for song in item['songs']]
+
+    @property
+    def database(self) -> 'DatabaseManager':
+        if self.db is None:
+            raise RuntimeError('Нет подключения к базе данных')
+        return self.db
+
+    @property
+    def schema(self) -> str:
+        return self.db.schema_name if self.db else 'public'
+
+    def ingest(self, root: str = INGEST['ROOT']) -> float:
+        """
+        Загружает дерево jsons: сначала исполнителей, затем альбомы,
+        затем песни
+
+        Args:
+            root (str): корень дерева
+
+        Returns:
+            float: скорость загрузки, строк в секунду
+        """
+        started = time.perf_counter()
+        if self.db is not None:
+            self.warm_existing_keys()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            self.load_artists(executor, collect_files(root, 'artists'))
+            self.load_albums(executor, collect_files(root, 'albums'))
+            self.load_songs(executor, collect_files(root, 'songs'))
+        elapsed = time.perf_counter() - started
+        rate = self.rows / elapsed if elapsed else 0.0
+        print(f'Загружено строк: {self.rows}, пропущено: {self.skipped}, '
+              f'{elapsed:.1f} сек., {rate:.0f} строк/сек.')
+        return rate
+
+
+def make_synthetic_tree(root: str, songs: int, albums_per_artist: int = 10,
+                        songs_per_album: int = 10) -> None:
+    """
+    Создаёт синтетическое дерево jsons заданного размера
+    для замера скорости загрузки
+
+    Args:
+        root (str): корень дерева
+        songs (int): общее количество песен
+        albums_per_artist (int): количество альбомов у исполнителя
+        songs_per_album (int): количество песен в альбоме
+
+    Returns:
+        None
+    """
+    artists = max(songs // (albums_per_artist * songs_per_album), 1)
+    page_size = 50
+    artists_folder = os.path.join(root, 'artists', 'synthetic')
+    os.makedirs(artists_folder, exist_ok=True)
+    for start in range(0, artists, page_size):
+        page = [{'username': f'artist {i}', 'description': 'Синтетика.',
+                 'avatar': f'artist {i}.jpg'}
+                for i in range(start, min(start + page_size, artists))]
+        path = os.path.join(artists_folder,
+                            f'page={start // page_size + 1}.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(page, file)
+    song_list = [{'name': f'song {i}', 'duration': '00:03:21'}
+                 for i in range(songs_per_album)]
+    for i in range(artists):
+        artist = f'artist {i}'
+        albums_folder = os.path.join(root, 'albums', artist)
+        songs_folder = os.path.join(root, 'songs', artist)
+        os.makedirs(albums_folder, exist_ok=True)
+        os.makedirs(songs_folder, exist_ok=True)
+        albums = [{'name': f'album {j}', 'publication_date': '2000-01-01',
+                   'cover': f'album {j}.jpg'}
+                  for j in range(albums_per_artist)]
+        with open(os.path.join(albums_folder, 'page=1.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(albums, file)
+        for album in albums:
+            path = os.path.join(songs_folder, f'{album["name"]}.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(song_list, file)
+
+
+def main():
+    """
+    Точка входа команды загрузки дерева jsons
+    """
+    arg_parser = argparse.ArgumentParser(
+        description='Загрузка дерева jsons в базу данных')
+    arg_parser.add_argument('root', nargs='?', default=INGEST['ROOT'])
+    arg_parser.add_argument('--workers', type=int, default=INGEST['WORKERS'])
+    arg_parser.add_argument('--batch-size', type=int,
+                            default=INGEST['BATCH_SIZE'])
+    arg_parser.add_argument('--synthetic', type=int, metavar='SONGS',
+                            help='создать синтетическое дерево перед загрузкой')
+    arg_parser.add_argument('--dry-run', action='store_true',
+                            help='только разбор файлов, без записи в БД')
+    args = arg_parser.parse_args()
+    from dotenv import load_dotenv
+    load_dotenv()
+    if args.synthetic:
+        make_synthetic_tree(args.root, args.synthetic)
+    if args.dry_run:
+        Ingestor(None, args.workers, args.batch_size).ingest(args.root)
+        return
+    from db_manager import DatabaseManager
+
+    with DatabaseManager() as db:
+        Ingestor(db, args.workers, args.batch_size).ingest(args.root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+from typing import Callable, Hashable, Iterable, TypeVar
+import hashlib
+import math
+
+from config import KEY_FILTER
+
+
+T = TypeVar('T')
+
+
+class BloomFilter:
+    """
+    Фильтр Блума для ключей очень больших таблиц
+    """
+
+    def __init__(self, capacity: int,
+                 error_rate: float = KEY_FILTER['ERROR_RATE']):
+        capacity = max(capacity, 1)
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key: Hashable) -> Iterable[int]:
+        digest = hashlib.blake2b(repr(key).encode('utf-8'),
+                                 digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key: Hashable) -> None:
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self.positions(key))
+
+
+class KeyFilter:
+    """
+    Множество ключей строк, уже существующих в базе данных.
+    Для больших таблиц используется фильтр Блума, а его
+    срабатывания перепроверяются одним запросом на пачку
+    """
+
+    def __init__(self, expected: int,
+                 confirm: Callable[[list], set] | None = None,
+                 threshold: int = KEY_FILTER['BLOOM_THRESHOLD']):
+        self.confirm = confirm
+        self.bloom = expected > threshold and confirm is not None
+        self.keys: set | BloomFilter = \
+            BloomFilter(expected) if self.bloom else set()
+        # Ключи, добавленные в этом запуске при фильтре Блума:
+        # их нельзя перепроверить в базе, пока пачка не записана
+        self.added: set = set()
+
+    def add(self, key: Hashable) -> None:
+        self.keys.add(key)
+
+    def remember(self, key: Hashable) -> None:
+        self.keys.add(key)
+        if self.bloom:
+            self.added.add(key)
+
+    def new_rows(self, rows: list[T], key: Callable[[T], Hashable]) -> list[T]:
+        """
+        Оставляет только строки, которых ещё нет в базе данных
+        и которые не встречались раньше в этом запуске
+
+        Args:
+            rows (list[T]): входящие строки
+            key (Callable[[T], Hashable]): ключ строки
+
+        Returns:
+            list[T]: новые строки
+        """
+        fresh, maybe = [], []
+        for row in rows:
+            row_key = key(row)
+            if row_key in self.added:
+                continue
+            if row_key not in self.keys:
+                fresh.append(row)
+                self.remember(row_key)
+            elif self.bloom:
+                maybe.append(row)
+        if maybe and self.confirm is not None:
+            existing = self.confirm(list({key(row): None for row in maybe}))
+            for row in maybe:
+                row_key = key(row)
+                if row_key not in existing and row_key not in self.added:
+                    fresh.append(row)
+                    self.remember(row_key)
+        return fresh
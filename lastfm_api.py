@@ -0,0 +1,221 @@
+from array import array
+from datetime import date
+import os
+
+import requests
+
+from config import LASTFM_API, LIMITS
+from data_classes import SongBatch
+from exceptions import CircuitOpenError, LastFmApiError
+from parser import MusicParser
+
+
+FALLBACK_ERRORS = (
+    LastFmApiError,
+    CircuitOpenError,
+    requests.RequestException,
+    KeyError,
+    IndexError,
+    ValueError,
+)
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+
+def as_list(value) -> list:
+    """
+    Приводит поле ответа API к списку: при одном элементе
+    last.fm возвращает объект вместо массива
+
+    Args:
+        value: значение поля
+
+    Returns:
+        list: список элементов
+    """
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def largest_image(images: list[dict]) -> str:
+    """
+    Возвращает ссылку на самое большое изображение из ответа API.
+    API отдаёт одну и ту же заглушку всем исполнителям без фото,
+    поэтому заглушка считается отсутствием изображения
+
+    Args:
+        images (list[dict]): список изображений разных размеров
+
+    Raises:
+        LastFmApiError: в ответе нет изображений или только заглушка
+
+    Returns:
+        str: URL-адрес изображения
+    """
+    urls = [image['#text'] for image in images if image.get('#text')]
+    if not urls:
+        raise LastFmApiError('В ответе нет изображений')
+    if any(placeholder in urls[-1]
+           for placeholder in LASTFM_API['PLACEHOLDER_IMAGES']):
+        raise LastFmApiError('В ответе только изображение-заглушка')
+    return urls[-1]
+
+
+class LastFmApiParser(MusicParser):
+    """
+    MusicParser, получающий данные через JSON API last.fm.
+    При ошибке API используется разбор HTML-страниц,
+    кроме постраничных списков исполнителей и альбомов
+    """
+
+    def __init__(self, api_key: str | None = None,
+                 api_url: str | None = None, archive=None):
+        super().__init__(archive=archive)
+        self.api_key = api_key or os.getenv('LASTFM_API_KEY')
+        self.api_url = (api_url or os.getenv('LASTFM_API_URL')
+                        or LASTFM_API['URL'])
+        self.albums_info: dict[tuple[str, str], dict] = {}
+        self.artists_info: dict[str, dict] = {}
+
+    def call(self, method: str, **params) -> dict:
+        """
+        Вызывает метод JSON API last.fm
+
+        Args:
+            method (str): название метода API
+            params: параметры метода
+
+        Raises:
+            LastFmApiError: API вернуло ошибку
+
+        Returns:
+            dict: ответ API
+        """
+        if not self.api_key:
+            raise LastFmApiError('Не задан LASTFM_API_KEY')
+        response = self.fetch(self.api_url, params={
+            'method': method,
+            'api_key': self.api_key,
+            'format': 'json',
+            **params,
+        })
+        data = response.json()
+        if 'error' in data:
+            raise LastFmApiError(f'{method}: {data.get("message")}')
+        return data
+
+    def album_info(self, artist: str, title: str) -> dict:
+        """
+        Возвращает album.getInfo; ответ кэшируется, так что песни,
+        дата публикации и обложка альбома стоят одного запроса
+
+        Args:
+            artist (str): никнейм исполнителя
+            title (str): название альбома
+
+        Returns:
+            dict: информация об альбоме
+        """
+        key = (artist, title)
+        if key not in self.albums_info:
+            self.albums_info[key] = self.call(
+                'album.getInfo', artist=artist, album=title,
+                autocorrect=1)['album']
+        return self.albums_info[key]
+
+    def artist_info(self, artist: str) -> dict:
+        """
+        Возвращает artist.getInfo; ответ кэшируется для описания
+        и изображения исполнителя
+
+        Args:
+            artist (str): никнейм исполнителя
+
+        Returns:
+            dict: информация об исполнителе
+        """
+        if artist not in self.artists_info:
+            self.artists_info[artist] = self.call(
+                'artist.getInfo', artist=artist, autocorrect=1)['artist']
+        return self.artists_info[artist]
+
+    # Постраничные списки не переключаются на HTML: на странице API
+    # PAGE_SIZE элементов, а на HTML-странице около двадцати, поэтому
+    # при смешивании источников элементы пропускались бы или дублировались
+
+    def get_paginated_artists_by_genre(self, genre: str, page: int) -> list[str]:
+        data = self.call('tag.getTopArtists', tag=genre, page=page,
+                         limit=LASTFM_API['PAGE_SIZE'])
+        return [item['name']
+                for item in as_list(data['topartists']['artist'])]
+
+    def get_max_pages(self, genre: str) -> int:
+        data = self.call('tag.getTopArtists', tag=genre, page=1,
+                         limit=LASTFM_API['PAGE_SIZE'])
+        return int(data['topartists']['@attr']['totalPages'])
+
+    def get_artist_albums(self, artist: str, page: int = 1) -> list[str]:
+        data = self.call('artist.getTopAlbums', artist=artist, page=page,
+                         limit=LASTFM_API['PAGE_SIZE'], autocorrect=1)
+        return [item['name']
+                for item in as_list(data['topalbums']['album'])]
+
+    def get_albums_max_pages(self, artist: str) -> int:
+        data = self.call('artist.getTopAlbums', artist=artist, page=1,
+                         limit=LASTFM_API['PAGE_SIZE'], autocorrect=1)
+        return min(int(data['topalbums']['@attr']['totalPages']),
+                   LIMITS['ARTIST_ALBUMS_PAGE_LIMIT'])
+
+    def get_album_songs(self, artist: str, title: str) -> SongBatch:
+        try:
+            tracks = as_list(
+                self.album_info(artist, title)['tracks']['track'])
+            # API отдаёт длительность в секундах, как и хранит SongBatch,
+            # но у части песен её нет
+            durations = array('i', (int(track.get('duration') or 0)
+                                    for track in tracks))
+            if not tracks or not all(durations):
+                raise LastFmApiError('В ответе нет длительности песен')
+            return SongBatch([track['name'] for track in tracks], durations)
+        except FALLBACK_ERRORS as e:
+            print(f'API: {e}, используется HTML')
+            return super().get_album_songs(artist, title)
+
+    def get_publication_date(self, artist: str, album_title: str) -> date:
+        try:
+            info = self.album_info(artist, album_title)
+            # Формат API: "6 Apr 1999, 00:00"; у многих альбомов даты нет
+            raw_date = info.get('releasedate', '').strip()
+            if not raw_date:
+                raise LastFmApiError('В ответе нет даты публикации')
+            day, month, year = raw_date.split(',')[0].split()
+            return date(int(year), MONTHS[month.lower()[:3]], int(day))
+        except FALLBACK_ERRORS as e:
+            print(f'API: {e}, используется HTML')
+            return super().get_publication_date(artist, album_title)
+
+    def get_album_cover_url(self, artist: str, title: str) -> str:
+        try:
+            return largest_image(self.album_info(artist, title)['image'])
+        except FALLBACK_ERRORS as e:
+            print(f'API: {e}, используется HTML')
+            return super().get_album_cover_url(artist, title)
+
+    def get_artist_description(self, artist: str) -> str:
+        try:
+            bio = self.artist_info(artist)['bio']['content'].strip()
+        except FALLBACK_ERRORS as e:
+            print(f'API: {e}, используется HTML')
+            return super().get_artist_description(artist)
+        return bio or super().get_artist_description(artist)
+
+    def get_artist_image_url(self, artist: str) -> str:
+        try:
+            return largest_image(self.artist_info(artist)['image'])
+        except FALLBACK_ERRORS as e:
+            print(f'API: {e}, используется HTML')
+            return super().get_artist_image_url(artist)
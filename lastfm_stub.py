@@ -0,0 +1,206 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+import requests
+
+from config import LASTFM_API
+from lastfm_api import LastFmApiParser
+from parser import MusicParser
+
+
+def recording_path(root: str, params: dict) -> str:
+    """
+    Возвращает путь к записанному ответу API для параметров запроса
+
+    Args:
+        root (str): папка с записанными ответами
+        params (dict): параметры запроса
+
+    Returns:
+        str: путь к JSON-файлу
+    """
+    key = {name: value for name, value in params.items()
+           if name not in ('api_key', 'format')}
+    digest = hashlib.sha1(
+        urlencode(sorted(key.items())).encode('utf-8')).hexdigest()
+    return os.path.join(root, key.get('method', 'unknown').lower(),
+                        f'{digest}.json')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Отдаёт записанные ответы JSON API last.fm. В режиме записи
+    отсутствующие ответы запрашиваются у настоящего API и сохраняются
+    """
+    root = LASTFM_API['RECORDINGS_DIR']
+    record = False
+
+    def do_GET(self):
+        params = dict(parse_qsl(urlsplit(self.path).query))
+        path = recording_path(self.root, params)
+        if not os.path.exists(path) and self.record:
+            response = requests.get(LASTFM_API['URL'], params=params)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(response.content)
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                body = file.read()
+            status = 200
+        else:
+            body = json.dumps(
+                {'error': 6, 'message': 'Response was not recorded'}
+            ).encode('utf-8')
+            status = 404
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int = LASTFM_API['STUB_PORT'],
+          root: str = LASTFM_API['RECORDINGS_DIR'],
+          record: bool = False) -> ThreadingHTTPServer:
+    """
+    Запускает заглушку API в фоновом потоке
+
+    Args:
+        port (int): порт
+        root (str): папка с записанными ответами
+        record (bool): записывать отсутствующие ответы
+
+    Returns:
+        ThreadingHTTPServer: запущенный сервер
+    """
+    handler = type('Handler', (StubHandler,), {'root': root,
+                                                'record': record})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StubOnlyParser(LastFmApiParser):
+    """
+    Парсер JSON API, которому разрешены только запросы к заглушке:
+    переключение на HTML-страницы завершается ошибкой
+    """
+
+    def fetch(self, url: str, **kwargs) -> requests.Response:
+        if not url.startswith(self.api_url):
+            raise RuntimeError(f'Запрос мимо заглушки: "{url}"')
+        return super().fetch(url, **kwargs)
+
+
+def run_workload(parser: MusicParser, genre: str, artist: str,
+                 albums: int, artist_image: bool = True) -> dict:
+    """
+    Собирает одинаковый набор данных: страницу исполнителей жанра,
+    описание и изображение исполнителя, его альбомы, их песни,
+    даты публикации и обложки
+
+    Args:
+        parser (MusicParser): парсер
+        genre (str): название жанра
+        artist (str): никнейм исполнителя
+        albums (int): количество альбомов
+        artist_image (bool): запрашивать изображение исполнителя
+
+    Returns:
+        dict: статистика запросов парсера
+    """
+    parser.get_paginated_artists_by_genre(genre, 1)
+    parser.get_artist_description(artist)
+    if artist_image:
+        parser.get_artist_image_url(artist)
+    for title in parser.get_artist_albums(artist, 1)[:albums]:
+        parser.get_album_songs(artist, title)
+        parser.get_publication_date(artist, title)
+        parser.get_album_cover_url(artist, title)
+    return parser.stats
+
+
+def check(port: int, root: str, genre: str, artist: str,
+          albums: int) -> None:
+    """
+    Проверка без сети: прогоняет набор данных через заглушку
+    и убеждается, что все ответы взяты из записей. Изображение
+    исполнителя не проверяется: вместо фото API отдаёт заглушку,
+    и оно всегда берётся из HTML
+
+    Args:
+        port (int): порт
+        root (str): папка с записанными ответами
+        genre (str): название жанра
+        artist (str): никнейм исполнителя
+        albums (int): количество альбомов
+
+    Raises:
+        RuntimeError: ответа нет в записях или запросов больше ожидаемого
+
+    Returns:
+        None
+    """
+    server = serve(port, root)
+    try:
+        parser = StubOnlyParser(api_key='stub',
+                                api_url=f'http://127.0.0.1:{port}/2.0/')
+        stats = run_workload(parser, genre, artist, albums,
+                             artist_image=False)
+    finally:
+        server.shutdown()
+    # Жанр, исполнитель, его альбомы и по одному album.getInfo на альбом
+    expected = 3 + albums
+    if stats['requests'] != expected:
+        raise RuntimeError(f'Запросов {stats["requests"]}, '
+                           f'ожидалось {expected}')
+    print(f'Проверка пройдена: запросов {stats["requests"]}')
+
+
+def main():
+    """
+    Сравнивает количество запросов, объём и время HTML-парсера
+    и парсера JSON API, работающего через заглушку
+    """
+    arg_parser = argparse.ArgumentParser(
+        description='Сравнение HTML-парсера и JSON API last.fm')
+    arg_parser.add_argument('--genre', default='rock')
+    arg_parser.add_argument('--artist', default='Queen')
+    arg_parser.add_argument('--albums', type=int, default=5)
+    arg_parser.add_argument('--port', type=int,
+                            default=LASTFM_API['STUB_PORT'])
+    arg_parser.add_argument('--root', default=LASTFM_API['RECORDINGS_DIR'])
+    arg_parser.add_argument('--record', action='store_true',
+                            help='записывать ответы настоящего API')
+    arg_parser.add_argument('--skip-html', action='store_true')
+    arg_parser.add_argument('--check', action='store_true',
+                            help='проверить парсер API на записях без сети')
+    args = arg_parser.parse_args()
+    if args.check:
+        check(args.port, args.root, args.genre, args.artist, args.albums)
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    server = serve(args.port, args.root, args.record)
+    parsers = {'api': LastFmApiParser(
+        api_key=os.getenv('LASTFM_API_KEY') or 'stub',
+        api_url=f'http://127.0.0.1:{args.port}/2.0/')}
+    if not args.skip_html:
+        parsers['html'] = MusicParser()
+    for name, parser in parsers.items():
+        stats = run_workload(parser, args.genre, args.artist, args.albums)
+        print(f'{name}: запросов {stats["requests"]}, '
+              f'{stats["bytes"]} байт, {stats["seconds"]:.2f} сек.')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
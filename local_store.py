@@ -0,0 +1,236 @@
+from datetime import date, time
+from glob import glob
+import json
+import os
+import sqlite3
+
+from config import INGEST, LOCAL_STORE
+from data_classes import Artist, Album, Song
+from normalize import durations_to_seconds, seconds_to_time
+from utils import sanitize_filename
+
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS artists (
+        id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL UNIQUE,
+        description TEXT NOT NULL,
+        avatar TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS artist_genres (
+        artist_id INTEGER NOT NULL REFERENCES artists(id),
+        genre TEXT NOT NULL,
+        PRIMARY KEY (genre, artist_id)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS albums (
+        id INTEGER PRIMARY KEY,
+        artist_id INTEGER NOT NULL REFERENCES artists(id),
+        name TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        publication_date TEXT NOT NULL,
+        cover TEXT NOT NULL,
+        UNIQUE (artist_id, file_name)
+    );
+    CREATE TABLE IF NOT EXISTS songs (
+        id INTEGER PRIMARY KEY,
+        album_id INTEGER NOT NULL REFERENCES albums(id),
+        name TEXT NOT NULL,
+        seconds INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS albums_publication_date
+        ON albums(publication_date);
+    CREATE INDEX IF NOT EXISTS songs_album_seconds
+        ON songs(album_id, seconds);
+    CREATE VIRTUAL TABLE IF NOT EXISTS artists_fts USING fts5(
+        username, description, content='artists', content_rowid='id'
+    );
+'''
+
+
+class LocalStore:
+    """
+    Локальное индексированное хранилище собранных данных на SQLite
+    """
+
+    def __init__(self, path: str = LOCAL_STORE['PATH']):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.connection.close()
+
+    def artist_id(self, username: str) -> int | None:
+        row = self.connection.execute(
+            'SELECT id FROM artists WHERE username = ?', (username,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def build(self, root: str = INGEST['ROOT']) -> None:
+        """
+        Заполняет хранилище из дерева jsons
+
+        Args:
+            root (str): корень дерева
+
+        Returns:
+            None
+        """
+        with self.connection:
+            pattern = os.path.join(root, 'artists', '*', 'page=*.json')
+            for path in sorted(glob(pattern)):
+                genre = os.path.basename(os.path.dirname(path))
+                with open(path, 'r', encoding='utf-8') as file:
+                    items = json.load(file)
+                for item in items:
+                    self.connection.execute(
+                        'INSERT INTO artists(username, description, avatar)'
+                        ' VALUES (?, ?, ?) ON CONFLICT(username) DO UPDATE'
+                        ' SET description = excluded.description,'
+                        ' avatar = excluded.avatar',
+                        (item['username'], item['description'],
+                         item['avatar'])
+                    )
+                    self.connection.execute(
+                        'INSERT OR IGNORE INTO artist_genres(artist_id, genre)'
+                        ' VALUES (?, ?)',
+                        (self.artist_id(item['username']), genre)
+                    )
+
+            pattern = os.path.join(root, 'albums', '*', 'page=*.json')
+            for path in sorted(glob(pattern)):
+                artist_id = self.artist_id(
+                    os.path.basename(os.path.dirname(path)))
+                if artist_id is None:
+                    continue
+                with open(path, 'r', encoding='utf-8') as file:
+                    items = json.load(file)
+                self.connection.executemany(
+                    'INSERT INTO albums(artist_id, name, file_name,'
+                    ' publication_date, cover) VALUES (?, ?, ?, ?, ?)'
+                    ' ON CONFLICT(artist_id, file_name) DO UPDATE'
+                    ' SET publication_date = excluded.publication_date,'
+                    ' cover = excluded.cover',
+                    [(artist_id, item['name'], sanitize_filename(item['name']),
+                      item['publication_date'], item['cover'])
+                     for item in items]
+                )
+
+            pattern = os.path.join(root, 'songs', '*', '*.json')
+            for path in sorted(glob(pattern)):
+                artist_id = self.artist_id(
+                    os.path.basename(os.path.dirname(path)))
+                file_name = os.path.splitext(os.path.basename(path))[0]
+                row = self.connection.execute(
+                    'SELECT id FROM albums WHERE artist_id = ?'
+                    ' AND file_name = ?', (artist_id, file_name)
+                ).fetchone()
+                if row is None:
+                    continue
+                self.connection.execute(
+                    'DELETE FROM songs WHERE album_id = ?', row)
+                with open(path, 'r', encoding='utf-8') as file:
+                    items = json.load(file)
+                seconds = durations_to_seconds(
+                    [item['duration'] for item in items])
+                self.connection.executemany(
+                    'INSERT INTO songs(album_id, name, seconds)'
+                    ' VALUES (?, ?, ?)',
+                    [(row[0], item['name'], duration)
+                     for item, duration in zip(items, seconds)]
+                )
+
+            self.connection.execute(
+                "INSERT INTO artists_fts(artists_fts) VALUES ('rebuild')")
+        print(f'Local store was built from "{root}"')
+
+    def albums(self, genre: str | None = None, artist: str | None = None,
+               after: date | None = None,
+               before: date | None = None) -> list[Album]:
+        """
+        Возвращает альбомы по жанру, исполнителю и периоду публикации
+
+        Args:
+            genre (str | None): название жанра
+            artist (str | None): никнейм исполнителя
+            after (date | None): опубликованы не раньше этой даты
+            before (date | None): опубликованы раньше этой даты
+
+        Returns:
+            list[Album]: список альбомов
+        """
+        query = ('SELECT albums.name, albums.publication_date, albums.cover'
+                 ' FROM albums JOIN artists ON artists.id = albums.artist_id')
+        conditions, params = [], []
+        if genre is not None:
+            query += (' JOIN artist_genres'
+                      ' ON artist_genres.artist_id = albums.artist_id')
+            conditions.append('artist_genres.genre = ?')
+            params.append(genre)
+        if artist is not None:
+            conditions.append('artists.username = ?')
+            params.append(artist)
+        if after is not None:
+            conditions.append('albums.publication_date >= ?')
+            params.append(after.isoformat())
+        if before is not None:
+            conditions.append('albums.publication_date < ?')
+            params.append(before.isoformat())
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY albums.publication_date'
+        return [Album(name, date.fromisoformat(publication_date), cover)
+                for name, publication_date, cover
+                in self.connection.execute(query, params)]
+
+    def songs(self, artist: str, album: str | None = None,
+              shorter_than: time | None = None) -> list[Song]:
+        """
+        Возвращает песни исполнителя, при необходимости
+        только одного альбома или короче заданной длительности
+
+        Args:
+            artist (str): никнейм исполнителя
+            album (str | None): название альбома
+            shorter_than (time | None): верхняя граница длительности
+
+        Returns:
+            list[Song]: список песен
+        """
+        query = ('SELECT songs.name, songs.seconds FROM songs'
+                 ' JOIN albums ON albums.id = songs.album_id'
+                 ' WHERE albums.artist_id = ?')
+        params: list = [self.artist_id(artist)]
+        if album is not None:
+            query += ' AND albums.name = ?'
+            params.append(album)
+        if shorter_than is not None:
+            query += ' AND songs.seconds < ?'
+            params.append(shorter_than.hour * 3600
+                          + shorter_than.minute * 60 + shorter_than.second)
+        return [Song(name, seconds_to_time(seconds))
+                for name, seconds in self.connection.execute(query, params)]
+
+    def search_artists(self, text: str, limit: int = 20) -> list[Artist]:
+        """
+        Полнотекстовый поиск исполнителей по описанию и никнейму
+
+        Args:
+            text (str): поисковый запрос в синтаксисе FTS5
+            limit (int): максимальное количество результатов
+
+        Returns:
+            list[Artist]: найденные исполнители
+        """
+        rows = self.connection.execute(
+            'SELECT artists.username, artists.avatar, artists.description'
+            ' FROM artists_fts JOIN artists ON artists.id = artists_fts.rowid'
+            ' WHERE artists_fts MATCH ? ORDER BY rank LIMIT ?',
+            (text, limit)
+        )
+        return [Artist(*row) for row in rows]
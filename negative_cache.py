@@ -0,0 +1,111 @@
+import json
+import os
+import time
+
+from config import NEGATIVE_CACHE
+
+
+class NegativeCache:
+    """
+    Сохраняемый на диск кэш отрицательных результатов:
+    запоминает данные, которых нет на сайте, чтобы
+    не запрашивать их повторно до истечения срока хранения
+    """
+
+    def __init__(self, path: str | None = NEGATIVE_CACHE['PATH'],
+                 ttl: int = NEGATIVE_CACHE['TTL'],
+                 save_every: int = NEGATIVE_CACHE['SAVE_EVERY']):
+        self.path = path
+        self.ttl = ttl
+        self.save_every = save_every
+        self.unsaved = 0
+        self.entries: dict[str, float] = self.load()
+
+    def load(self) -> dict[str, float]:
+        """
+        Загружает кэш из JSON-файла, отбрасывая просроченные записи
+
+        Returns:
+            dict[str, float]: ключ записи и время её истечения
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as file:
+            entries = json.load(file)
+        now = time.time()
+        return {key: expires for key, expires in entries.items()
+                if expires > now}
+
+    def save(self) -> None:
+        """
+        Атомарно записывает кэш в JSON-файл, предварительно объединяя
+        его с файлом на диске, чтобы не затереть записи, добавленные
+        другими процессами. Кэш без пути хранится только в памяти
+
+        Returns:
+            None
+        """
+        if self.path is None or not self.unsaved:
+            return
+        for key, expires in self.load().items():
+            if expires > self.entries.get(key, 0):
+                self.entries[key] = expires
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file)
+        os.replace(tmp_path, self.path)
+        self.unsaved = 0
+
+    def make_key(self, kind: str, *parts: str) -> str:
+        """
+        Формирует ключ записи
+
+        Args:
+            kind (str): тип отсутствующих данных
+            parts (str): идентификаторы сущности
+
+        Returns:
+            str: ключ записи
+        """
+        return '/'.join((kind, *parts))
+
+    def contains(self, kind: str, *parts: str) -> bool:
+        """
+        Проверяет, известно ли, что данные отсутствуют
+
+        Args:
+            kind (str): тип отсутствующих данных
+            parts (str): идентификаторы сущности
+
+        Returns:
+            bool: True, если запись есть и не просрочена
+        """
+        key = self.make_key(kind, *parts)
+        expires = self.entries.get(key)
+        if expires is None:
+            return False
+        if expires <= time.time():
+            del self.entries[key]
+            return False
+        return True
+
+    def add(self, kind: str, *parts: str) -> None:
+        """
+        Запоминает отсутствие данных. Кэш сохраняется
+        на диск после каждых save_every новых записей
+
+        Args:
+            kind (str): тип отсутствующих данных
+            parts (str): идентификаторы сущности
+
+        Returns:
+            None
+        """
+        key = self.make_key(kind, *parts)
+        self.entries[key] = time.time() + self.ttl
+        self.unsaved += 1
+        if self.unsaved >= self.save_every:
+            self.save()
@@ -0,0 +1,230 @@
+from array import array
+from datetime import date, time
+from typing import Sequence
+import re
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+MONTHS = {
+    'января': 1, 'февраля': 2, 'марта': 3,
+    'апреля': 4, 'мая': 5, 'июня': 6,
+    'июля': 7, 'августа': 8, 'сентября': 9,
+    'октября': 10, 'ноября': 11, 'декабря': 12,
+    'январь': 1, 'февраль': 2, 'март': 3,
+    'апрель': 4, 'май': 5, 'июнь': 6,
+    'июль': 7, 'август': 8, 'сентябрь': 9,
+    'октябрь': 10, 'ноябрь': 11, 'декабрь': 12,
+}
+
+DURATION_PATTERN = re.compile(r'(?:(?:(\d+):)?(\d+):)?(\d+)')
+DATE_PATTERN = re.compile(r'(?:(?:(\d{1,2})\s+)?(\w+)\s+)?(\d{4})')
+
+# Ширина строки длительности "HH:MM:SS" для векторного разбора
+DURATION_WIDTH = 8
+
+
+def duration_seconds(raw_duration: str) -> int:
+    """
+    Преобразует строку формата "%H:%M:%S", "%M:%S" или "%S" в секунды
+
+    Args:
+        raw_duration (str): продолжительность песни
+
+    Returns:
+        int: продолжительность в секундах
+    """
+    match = DURATION_PATTERN.fullmatch(raw_duration.strip())
+    if match is None:
+        raise ValueError(f'Неверная длительность: "{raw_duration}"')
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def seconds_to_time(seconds: int) -> time:
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def vectorised_seconds(raw: Sequence[str]):
+    """
+    Разбирает длительности NumPy: строки выравниваются по правому краю
+    до "HH:MM:SS", и цифры читаются из фиксированных столбцов.
+    Строки другого вида отмечаются в маске
+
+    Args:
+        raw (Sequence[str]): длительности песен
+
+    Returns:
+        tuple: секунды и маска корректно разобранных строк,
+        или None, если столбец нельзя разобрать целиком
+    """
+    try:
+        encoded = np.array(raw, dtype='S')
+    except UnicodeEncodeError:
+        return None
+    if encoded.dtype.itemsize > DURATION_WIDTH:
+        return None
+    encoded = np.char.strip(encoded)
+    chars = np.char.rjust(encoded, DURATION_WIDTH) \
+        .astype(f'S{DURATION_WIDTH}').view(np.uint8) \
+        .reshape(-1, DURATION_WIDTH)
+    is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+    is_blank = chars == ord(' ')
+    is_colon = chars == ord(':')
+    digits = np.where(is_digit, chars - ord('0'), 0).astype(np.int32)
+    # "S", "SS", "M:SS", "MM:SS", "H:MM:SS", "HH:MM:SS"
+    seconds_only = is_blank[:, :6].all(axis=1) & is_digit[:, 7]
+    with_minutes = (is_colon[:, 5] & is_digit[:, 4] & is_digit[:, 6]
+                    & is_digit[:, 7] & (is_digit[:, 3] | is_blank[:, 3]))
+    short = with_minutes & is_blank[:, :3].all(axis=1)
+    long = (with_minutes & is_colon[:, 2] & is_digit[:, 1] & is_digit[:, 3]
+            & (is_digit[:, 0] | is_blank[:, 0]))
+    valid = (seconds_only & (is_digit[:, 6] | is_blank[:, 6])) | short | long
+    seconds = (
+        (digits[:, 0] * 10 + digits[:, 1]) * 3600
+        + (digits[:, 3] * 10 + digits[:, 4]) * 60
+        + digits[:, 6] * 10 + digits[:, 7]
+    )
+    return seconds, valid
+
+
+def durations_to_seconds(raw: Sequence[str]) -> array:
+    """
+    Преобразует столбец длительностей в массив секунд.
+    При наличии NumPy разбор векторизован
+
+    Args:
+        raw (Sequence[str]): длительности песен
+
+    Returns:
+        array: длительности в секундах
+    """
+    if not HAS_NUMPY or not raw:
+        return array('i', map(duration_seconds, raw))
+    result = vectorised_seconds(raw)
+    if result is None:
+        return array('i', map(duration_seconds, raw))
+    seconds, valid = result
+    converted = array('i', seconds.astype(np.int32).tobytes())
+    for index in np.flatnonzero(~valid):
+        converted[index] = duration_seconds(raw[int(index)])
+    return converted
+
+
+def normalize_durations(raw: Sequence[str]) -> list[time]:
+    """
+    Преобразует столбец длительностей в объекты time
+
+    Args:
+        raw (Sequence[str]): длительности песен
+
+    Returns:
+        list[time]: длительности песен
+    """
+    return [seconds_to_time(seconds)
+            for seconds in durations_to_seconds(raw)]
+
+
+def parse_date(publication_date: str) -> date:
+    """
+    Преобразует дату публикации "ДЕНЬ МЕСЯЦ ГОД", "МЕСЯЦ ГОД"
+    или "ГОД" в объект date
+
+    Args:
+        publication_date (str): дата публикации
+
+    Returns:
+        date: дата публикации
+    """
+    match = DATE_PATTERN.fullmatch(publication_date.strip())
+    if match is None:
+        raise ValueError(f'Неверная дата: "{publication_date}"')
+    day, month, year = match.groups()
+    return date(int(year),
+                MONTHS[month.lower()] if month else 1,
+                int(day) if day else 1)
+
+
+def normalize_dates(raw: Sequence[str]) -> list[date]:
+    """
+    Преобразует столбец дат публикации; одинаковые строки
+    разбираются один раз
+
+    Args:
+        raw (Sequence[str]): даты публикации
+
+    Returns:
+        list[date]: даты публикации
+    """
+    parsed: dict[str, date] = {}
+    result = []
+    for value in raw:
+        converted = parsed.get(value)
+        if converted is None:
+            converted = parsed[value] = parse_date(value)
+        result.append(converted)
+    return result
+
+
+def dates_to_ordinals(raw: Sequence[str]) -> array:
+    """
+    Преобразует столбец дат публикации в массив порядковых номеров дней
+
+    Args:
+        raw (Sequence[str]): даты публикации
+
+    Returns:
+        array: результаты date.toordinal()
+    """
+    return array('i', (value.toordinal() for value in normalize_dates(raw)))
+
+
+def main():
+    """
+    Замер скорости пакетного разбора и памяти на миллион песен
+    """
+    from data_classes import Song, SongBatch
+    from time import perf_counter
+    import random
+    import tracemalloc
+
+    count = 1_000_000
+    raw = [random.choice((f'{random.randint(0, 59)}:'
+                          f'{random.randint(0, 59):02d}',
+                          f'1:{random.randint(0, 59):02d}:'
+                          f'{random.randint(0, 59):02d}'))
+           for _ in range(count)]
+    names = [f'song {index}' for index in range(count)]
+
+    started = perf_counter()
+    for value in raw:
+        seconds_to_time(duration_seconds(value))
+    print(f'По одной: {count / (perf_counter() - started):,.0f} строк/сек.')
+    started = perf_counter()
+    durations_to_seconds(raw)
+    engine = 'NumPy' if HAS_NUMPY else 're'
+    print(f'Пакетно ({engine}): '
+          f'{count / (perf_counter() - started):,.0f} строк/сек.')
+
+    tracemalloc.start()
+    dicts = [Song(name, seconds_to_time(duration_seconds(value))).to_dict()
+             for name, value in zip(names, raw)]
+    size, _ = tracemalloc.get_traced_memory()
+    del dicts
+    tracemalloc.stop()
+    print(f'Список словарей: {size / 2 ** 20:.0f} МБ на {count:,} песен')
+    tracemalloc.start()
+    batch = SongBatch.from_raw(names, raw)
+    size, _ = tracemalloc.get_traced_memory()
+    del batch
+    tracemalloc.stop()
+    print(f'SongBatch: {size / 2 ** 20:.0f} МБ на {count:,} песен '
+          f'(без учёта общих строк названий)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,42 @@
 from bs4 import BeautifulSoup
 from datetime import time, date
-from dotenv import load_dotenv
+from time import perf_counter
+from urllib.parse import urlsplit
 import os
-import re
 import json
 import requests
 
 from config import (
     SELECTORS,
+    LIMITS,
     HEADERS,
     GENRES_DIR,
     ARTIST_IMAGES,
+    CIRCUIT_BREAKER,
+    ARCHIVE,
 )
 from exceptions import (
     GenreError,
     PageNumberError,
+    CircuitOpenError,
 )
+from negative_cache import NegativeCache
+from circuit_breaker import CircuitBreaker
+from prefetch import prefetch_pages
 from data_classes import (
     Artist,
     ArtistURL,
     AlbumURL,
     Album,
-    Song
+    AlbumBatch,
+    SongBatch,
 )
-
-
-load_dotenv()
+from normalize import (
+    duration_seconds,
+    seconds_to_time,
+    parse_date,
+)
+from utils import sanitize_filename
 
 
 def ensure_directories_exists():
@@ -37,6 +48,50 @@ def ensure_directories_exists():
 
 
 class MusicParser:
+    def __init__(self, archive=None):
+        self.negative_cache = NegativeCache()
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.stats = {'requests': 0, 'bytes': 0, 'seconds': 0.0}
+        if archive is None and ARCHIVE['ENABLED']:
+            from html_archive import HtmlArchive
+            archive = HtmlArchive()
+        self.archive = archive
+
+    def fetch(self, url: str, **kwargs) -> requests.Response:
+        """
+        Выполняет GET-запрос через предохранитель хоста
+
+        Args:
+            url (str): URL-адрес
+            kwargs: параметры, передаваемые в requests.get
+
+        Raises:
+            CircuitOpenError: запросы к хосту приостановлены
+
+        Returns:
+            requests.Response: ответ сервера
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breakers.setdefault(host, CircuitBreaker(host))
+        breaker.before_request()
+        kwargs.setdefault('timeout', CIRCUIT_BREAKER['REQUEST_TIMEOUT'])
+        started = perf_counter()
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.RequestException:
+            breaker.record(False)
+            raise
+        finally:
+            self.stats['requests'] += 1
+            self.stats['seconds'] += perf_counter() - started
+        self.stats['bytes'] += len(response.content)
+        breaker.record(
+            response.status_code < 500 and response.status_code != 429)
+        content_type = response.headers.get('Content-Type', '')
+        if self.archive is not None and 'text/html' in content_type:
+            self.archive.put(url, response.status_code, response.content)
+        return response
+
     def get_genre_artists_url(self, genre: str) -> str:
         """
         Возвращает URL-адрес со списком исполнителей, поющих в данном жанре
@@ -123,16 +178,7 @@ class MusicParser:
         Returns:
             time: продолжительность песни
         """
-        parts = [int(part) for part in raw_duration.split(':')]
-        num_of_parts = len(parts)
-        match num_of_parts:
-            case 1:
-                _duration = time(0, 0, parts[0])
-            case 2:
-                _duration = time(0, *parts)
-            case 3:
-                _duration = time(*parts)
-        return _duration
+        return seconds_to_time(duration_seconds(raw_duration))
 
     def get_max_pages(self, genre: str) -> int:
         """
@@ -145,7 +191,7 @@ class MusicParser:
             str: URL-адрес
         """
         url = self.get_genre_artists_url(genre)
-        response = requests.get(url)
+        response = self.fetch(url)
         soup = BeautifulSoup(response.text, 'html.parser')
         all_list_items = soup.find_all(
             SELECTORS['MAX_PAGES'][0],
@@ -162,7 +208,7 @@ class MusicParser:
             list[str]: список жанров
         """
         url = 'https://www.last.fm/ru/music'
-        response = requests.get(url, headers=HEADERS)
+        response = self.fetch(url, headers=HEADERS)
         soup = BeautifulSoup(response.text, 'html.parser')
         items = soup.find_all(
             SELECTORS['GENRE_CLASS'][0], SELECTORS['GENRE_CLASS'][1])
@@ -179,8 +225,15 @@ class MusicParser:
         Returns:
             str: URL-адрес
         """
+        if self.negative_cache.contains('description', artist):
+            return 'No description needed.'
         url = self.get_artist_description_url(artist)
-        response = requests.get(url)
+        try:
+            response = self.fetch(url)
+        except (CircuitOpenError, requests.RequestException):
+            return 'No description needed.'
+        if response.status_code == 404:
+            self.negative_cache.add('description', artist)
         if response.status_code != 200:
             return 'No description needed.'
         soup = BeautifulSoup(response.text, 'html.parser')
@@ -201,7 +254,7 @@ class MusicParser:
             list[str]: список исполнителей
         """
         url = self.get_paginated_artists_url(genre, page)
-        response = requests.get(url)
+        response = self.fetch(url)
         soup = BeautifulSoup(response.text, 'html.parser')
         items = soup.find_all(
             SELECTORS['ARTISTS'][0],
@@ -210,19 +263,44 @@ class MusicParser:
         artists_on_page = [item.contents[0].text for item in items]
         return artists_on_page
 
-    def get_album_songs(self, artist: str, title: str) -> list[Song]:
+    def iter_paginated_artists_by_genre(
+            self, genre: str,
+            last_page: int = LIMITS['ARTISTS_PAGE_LIMIT'],
+            first_page: int = 1,
+            prefetch: int = LIMITS['PREFETCH_PAGES']):
+        """
+        Постранично возвращает исполнителей жанра, заранее
+        загружая следующие страницы в фоне
+
+        Args:
+            genre (str): название жанра
+            last_page (int): номер последней страницы
+            first_page (int): номер первой страницы
+            prefetch (int): количество страниц, загружаемых заранее
+
+        Returns:
+            Iterator[tuple[int, list[str]]]: номер страницы и исполнители
+        """
+        return prefetch_pages(
+            lambda page: self.get_paginated_artists_by_genre(genre, page),
+            last_page,
+            prefetch,
+            first_page
+        )
+
+    def get_album_songs(self, artist: str, title: str) -> SongBatch:
         """
-        Возвращает список объектов Song альбома
+        Возвращает песни альбома
 
         Args:
             artist (str): никнейм исполнителя
             title (str): название альбома
 
         Returns:
-            list[Song]: список песен альбома
+            SongBatch: песни альбома
         """
         url = self.get_album_url(artist, title)
-        response = requests.get(url)
+        response = self.fetch(url)
         soup = BeautifulSoup(response.text, 'html.parser')
         raw_tracks = soup.find_all(
             SELECTORS['TRACK_CLASS'][0],
@@ -234,8 +312,8 @@ class MusicParser:
         )
         tracks = [track.contents[1].text for track in raw_tracks]
         durations = [duration.text.strip() for duration in raw_durations]
-        return [Song(name, self.parse_duration_to_time(duration)).to_dict()
-                for name, duration in zip(tracks, durations)]
+        return SongBatch.from_raw(tracks[:len(durations)],
+                                  durations[:len(tracks)])
 
     def get_artist_albums(self, artist: str, page: int = 1) -> list[str]:
         """
@@ -248,7 +326,7 @@ class MusicParser:
             list[str]: список названий альбомов
         """
         url = self.get_artist_albums_url(artist, page)
-        response = requests.get(url)
+        response = self.fetch(url)
         soup = BeautifulSoup(response.text, 'html.parser')
         album_items = soup.find_all(
             SELECTORS['ALBUM_CLASS'][0],
@@ -257,9 +335,34 @@ class MusicParser:
         album_names = [item.contents[1].text for item in album_items]
         return album_names
 
+    def iter_artist_albums(self, artist: str,
+                           last_page: int = LIMITS['ARTIST_ALBUMS_PAGE_LIMIT'],
+                           first_page: int = 1,
+                           prefetch: int = LIMITS['PREFETCH_PAGES']):
+        """
+        Постранично возвращает альбомы исполнителя, заранее
+        загружая следующие страницы в фоне
+
+        Args:
+            artist (str): никнейм исполнителя
+            last_page (int): номер последней страницы
+            first_page (int): номер первой страницы
+            prefetch (int): количество страниц, загружаемых заранее
+
+        Returns:
+            Iterator[tuple[int, list[str]]]: номер страницы и альбомы
+        """
+        return prefetch_pages(
+            lambda page: self.get_artist_albums(artist, page),
+            last_page,
+            prefetch,
+            first_page
+        )
+
     def get_artist_image_url(self, artist: str) -> str:
         """
-        Возвращает URL-адрес изображения исполнителя
+        Возвращает URL-адрес изображения исполнителя: с genius.com,
+        а если его там нет, то с last.fm
 
         Args:
             artist (str): никнейм исполнителя
@@ -267,29 +370,54 @@ class MusicParser:
         Returns:
             str: URL-адрес изображения
         """
-        try:
-            url = self.get_artist_description_url(artist)
-            response = requests.get(url, headers=HEADERS)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            image_tag = soup.find_all(
-                SELECTORS['GENUIS_ARTIST_IMAGE_CLASS'][0],
-                SELECTORS['GENUIS_ARTIST_IMAGE_CLASS'][1]
-            )[0]
-            url = image_tag.contents[1]['style'].split(
-                "url('")[1].split("')")[0]
-            print(f'{artist} - {url}')
-        except IndexError:
+        url = None
+        if not self.negative_cache.contains('genius_image', artist):
+            url = self.get_genius_image_url(artist)
+        if url is None:
             img_url = self.get_artist_images_url(artist)
-            response = requests.get(img_url, headers=HEADERS)
+            response = self.fetch(img_url, headers=HEADERS)
             soup = BeautifulSoup(response.text, 'html.parser')
             images_items = soup.find_all(
                 SELECTORS['LAST_FM_ARTIST_IMAGE_CLASS'][0],
                 SELECTORS['LAST_FM_ARTIST_IMAGE_CLASS'][1],
             )
             url = images_items[0].contents[1].attrs['src']
-            print(f'{artist} - {url}')
+        print(f'{artist} - {url}')
         return url
 
+    def get_genius_image_url(self, artist: str) -> str | None:
+        """
+        Возвращает URL-адрес изображения исполнителя с genius.com.
+        Отсутствие изображения запоминается в кэше отрицательных
+        результатов
+
+        Args:
+            artist (str): никнейм исполнителя
+
+        Returns:
+            str | None: URL-адрес изображения или None,
+            если получить его не удалось
+        """
+        url = self.get_artist_description_url(artist)
+        try:
+            response = self.fetch(url, headers=HEADERS)
+        except (CircuitOpenError, requests.RequestException):
+            return None
+        soup = BeautifulSoup(response.text, 'html.parser')
+        image_tags = soup.find_all(
+            SELECTORS['GENUIS_ARTIST_IMAGE_CLASS'][0],
+            SELECTORS['GENUIS_ARTIST_IMAGE_CLASS'][1]
+        )
+        if not image_tags:
+            if response.status_code in (200, 404):
+                self.negative_cache.add('genius_image', artist)
+            return None
+        try:
+            return image_tags[0].contents[1]['style'].split(
+                "url('")[1].split("')")[0]
+        except IndexError:
+            return None
+
     def is_page_parsed(self, genre_folder: str, target_file: str) -> bool:
         """
         Проверяет, были ли собраны данные со страницы
@@ -320,6 +448,46 @@ class MusicParser:
         current_files = os.listdir(urls_folder)
         return target_file in current_files
 
+    def missing_items(self, path: str, key: str,
+                      items: list[str]) -> list[str]:
+        """
+        Возвращает элементы страницы, которых ещё нет в её JSON-файле:
+        файл мог быть записан частично, например планировщиком
+
+        Args:
+            path (str): путь к JSON-файлу страницы
+            key (str): поле записи с названием элемента
+            items (list[str]): элементы страницы
+
+        Returns:
+            list[str]: недостающие элементы
+        """
+        if not os.path.exists(path):
+            return items
+        with open(path, 'r', encoding='utf-8') as file:
+            parsed = {item[key] for item in json.load(file)}
+        return [item for item in items if item not in parsed]
+
+    def existing_records(self, path: str, key: str,
+                         replaced: list[str]) -> list[dict]:
+        """
+        Возвращает уже записанные записи страницы, кроме заменяемых
+
+        Args:
+            path (str): путь к JSON-файлу страницы
+            key (str): поле записи с названием элемента
+            replaced (list[str]): элементы, записи которых заменяются
+
+        Returns:
+            list[dict]: записи, которые нужно сохранить
+        """
+        if not os.path.exists(path):
+            return []
+        replaced_keys = set(replaced)
+        with open(path, 'r', encoding='utf-8') as file:
+            return [item for item in json.load(file)
+                    if item[key] not in replaced_keys]
+
     def write_artists(self, artists: list[str], genre_path: str, genre: str) -> None:
         """
         Записывает данные об артистах в JSON-файл
@@ -341,18 +509,20 @@ class MusicParser:
             descriptions.append(_description)
             avatars.append(_avatar_path)
 
-        instances = [
+        instances = self.existing_records(genre_path, 'username', artists)
+        instances.extend(
             Artist(username, avatar, description).to_dict()
             for username, avatar, description in zip(
                 artists, avatars, descriptions
             )
-        ]
+        )
 
         with open(genre_path, 'w', encoding='utf-8') as file:
             json.dump(instances, file)
             print(f'"{genre}" artists was dumped into "{genre_path}"')
 
-    def parse_artists(self, genre: str, page: int) -> None:
+    def parse_artists(self, genre: str, page: int,
+                      artists: list[str] | None = None) -> None:
         """
         Функция, которая отвечает за все стадии обработки
         данных об исполнителях
@@ -360,6 +530,8 @@ class MusicParser:
         Args:
             genre (str): название жанра
             page (int): номер страницы
+            artists (list[str] | None): уже загруженный список
+            исполнителей страницы
 
         Returns:
             None
@@ -377,20 +549,27 @@ class MusicParser:
         urls_folder = f'jsons/genre_artists/{genre}'
         urls_path = os.path.join(urls_folder, target_file)
         genre_path = os.path.join(genre_folder, target_file)
+        os.makedirs(genre_folder, exist_ok=True)
+        os.makedirs(urls_folder, exist_ok=True)
 
-        if self.is_urls_parsed(urls_folder, target_file):
+        if artists is None:
+            artists = self.get_paginated_artists_by_genre(genre, page)
+
+        # Дописываются только исполнители, которых ещё нет в файлах
+        missing = self.missing_items(urls_path, 'username', artists)
+        if not missing:
             print(
                 f'Artist`s urls of genre {genre} from page {page} were already parsed!'
             )
         else:
-            self.write_artists_urls(genre, page, urls_path)
+            self.write_artists_urls(genre, page, urls_path, missing)
 
-        if self.is_page_parsed(genre_folder, target_file):
+        missing = self.missing_items(genre_path, 'username', artists)
+        if not missing:
             print(
                 f'Artists of genre "{genre}" from page {page} were already parsed!')
         else:
-            artists = self.get_paginated_artists_by_genre(genre, page)
-            self.write_artists(artists, genre_path, genre)
+            self.write_artists(missing, genre_path, genre)
             self.save_images(genre, page)
 
     def save_images(self, genre: str, page: int) -> None:
@@ -411,7 +590,7 @@ class MusicParser:
             pic_name = f'{item["username"]}.jpg'
             avatars_folder = os.getenv('TARGET_AVATARS_FOLDER')
             path = os.path.join(avatars_folder, pic_name)
-            response = requests.get(
+            response = self.fetch(
                 item['url'], stream=True, headers=HEADERS)
             if response.status_code == 200:
                 with open(path, 'wb') as file:
@@ -420,7 +599,8 @@ class MusicParser:
             else:
                 print('Error while parsing:', response.status_code)
 
-    def write_artists_urls(self, genre: str, page: int, path: str) -> None:
+    def write_artists_urls(self, genre: str, page: int, path: str,
+                           artists: list[str] | None = None) -> None:
         """
         Отвечает за запись URL-адресов изображений исполнителей
         в JSON-файл
@@ -429,17 +609,21 @@ class MusicParser:
             genre (str): название жанра
             page (int): номер страницы
             path (str): путь к JSON-файлу
+            artists (list[str] | None): уже загруженный список
+            исполнителей страницы
 
         Returns:
             None
         """
-        artists = self.get_paginated_artists_by_genre(genre, page)
+        if artists is None:
+            artists = self.get_paginated_artists_by_genre(genre, page)
         urls = []
         for artist in artists:
             url = self.get_artist_image_url(artist)
             urls.append(url)
-        instances = [ArtistURL(artist, url).to_dict()
-                     for artist, url in zip(artists, urls)]
+        instances = self.existing_records(path, 'username', artists)
+        instances.extend(ArtistURL(artist, url).to_dict()
+                         for artist, url in zip(artists, urls))
         with open(path, 'w', encoding='utf-8') as file:
             json.dump(instances, file)
 
@@ -470,14 +654,14 @@ class MusicParser:
             str: URL-адрес
         """
         url = self.get_album_covers(artist, title)
-        response = requests.get(url)
+        response = self.fetch(url)
         soup = BeautifulSoup(response.text, 'html.parser')
         single_cover_url = 'https://www.last.fm' + \
             soup.find_all(
                 SELECTORS['LAST_FM_ARTIST_IMAGE_CLASS'][0],
                 SELECTORS['LAST_FM_ARTIST_IMAGE_CLASS'][1]
             )[0].attrs['href']
-        response = requests.get(single_cover_url)
+        response = self.fetch(single_cover_url)
         soup = BeautifulSoup(response.text, 'html.parser')
         tag = soup.find(
             SELECTORS['IMG_TAG'][0],
@@ -496,7 +680,7 @@ class MusicParser:
             int: номер последней страницы
         """
         url = self.get_artist_albums_url(artist, 1)
-        response = requests.get(url)
+        response = self.fetch(url)
         soup = BeautifulSoup(response.text, 'html.parser')
         item = soup.find_all(
             SELECTORS['MAX_PAGES'][0],
@@ -515,14 +699,19 @@ class MusicParser:
         Returns:
             date: дата публикации альбома
         """
+        if self.negative_cache.contains('publication_date',
+                                        artist, album_title):
+            return date(2000, 1, 1)
         url = self.get_album_url(artist, album_title)
-        response = requests.get(url)
+        response = self.fetch(url)
         soup = BeautifulSoup(response.text, 'html.parser')
         raw_publication_date = soup.find_all(
             SELECTORS['ALBUM_PUBLICATION_DATE_CLASS'][0],
             SELECTORS['ALBUM_PUBLICATION_DATE_CLASS'][1]
         )
-        if len(raw_publication_date) == 2:
+        if len(raw_publication_date) < 3 and response.status_code == 200:
+            self.negative_cache.add(
+                'publication_date', artist, album_title)
             return date(2000, 1, 1)
         publication_date = self.parse_publication_date(
             raw_publication_date[1].text.strip())
@@ -540,24 +729,7 @@ class MusicParser:
         Returns:
             date: дата публикации
         """
-        months = {
-            'января': 1, 'февраля': 2, 'марта': 3,
-            'апреля': 4, 'мая': 5, 'июня': 6,
-            'июля': 7, 'августа': 8, 'сентября': 9,
-            'октября': 10, 'ноября': 11, 'декабря': 12,
-            'январь': 1, 'февраль': 2, 'март': 3,
-            'апрель': 4, 'май': 5, 'июнь': 6,
-            'июль': 7, 'август': 8, 'сентябрь': 9,
-            'октябрь': 10, 'ноябрь': 11, 'декабрь': 12,
-        }
-        parts = publication_date.split()
-        match len(parts):
-            case 1:
-                return date(int(parts[0]), 1, 1)
-            case 2:
-                return date(int(parts[1]), months[parts[0].lower()], 1)
-            case 3:
-                return date(int(parts[2]), months[parts[1].lower()], int(parts[0]))
+        return parse_date(publication_date)
 
     def write_albums(self, artist: str, titles: list[str], albums_path: str) -> None:
         """
@@ -580,15 +752,17 @@ class MusicParser:
             covers.append(cover_path)
             print(f'{title} - {publication_date} - {cover_path}')
 
-        instances = [
-            Album(title, publication_date, cover_path).to_dict()
-            for title, publication_date, cover_path in zip(
-                titles, publication_dates, covers
-            )
-        ]
+        albums = AlbumBatch()
+        for item in self.existing_records(albums_path, 'name', titles):
+            albums.append(Album(item['name'],
+                                date.fromisoformat(item['publication_date']),
+                                item['cover']))
+        for title, publication_date, cover_path in zip(
+                titles, publication_dates, covers):
+            albums.append(Album(title, publication_date, cover_path))
 
         with open(albums_path, 'w', encoding='utf-8') as file:
-            json.dump(instances, file)
+            albums.dump(file)
             print(f'"{artist}" albums was dumped into "{albums_path}"')
 
     def sanitize_filename(self, filename: str) -> str:
@@ -601,9 +775,10 @@ class MusicParser:
         Returns:
             str: преобразованное название фалйа
         """
-        return re.sub(r'[\\/*?:"<>|]', '', filename)
+        return sanitize_filename(filename)
 
-    def parse_albums(self, artist: str, page: int = 1) -> None:
+    def parse_albums(self, artist: str, page: int = 1,
+                     titles: list[str] | None = None) -> None:
         """
         Функция, которая отвечает за все стадии обработки
         данных об альбомах исполнителя
@@ -611,6 +786,8 @@ class MusicParser:
         Args:
             artist (str): никнейм пользователя
             page (int): номер страницы
+            titles (list[str] | None): уже загруженный список
+            альбомов страницы
 
         Returns:
             None
@@ -619,21 +796,28 @@ class MusicParser:
         urls_folder = f'jsons/albums_urls/{artist}'
         albums_folder = f'jsons/albums/{artist}'
         albums_path = os.path.join(albums_folder, filename)
+        os.makedirs(albums_folder, exist_ok=True)
+
+        if titles is None:
+            titles = self.get_artist_albums(artist, page)
 
-        if self.is_urls_parsed(urls_folder, filename):
+        # Дописываются только альбомы, которых ещё нет в файлах
+        missing = self.missing_items(
+            os.path.join(urls_folder, filename), 'title', titles)
+        if not missing:
             print(
                 f'"{artist}`s" albums covers urls from page {page} were already parsed!'
             )
         else:
-            self.write_albums_urls(artist, page)
+            self.write_albums_urls(artist, page, missing)
 
-        if self.is_page_parsed(albums_folder, filename):
+        missing = self.missing_items(albums_path, 'name', titles)
+        if not missing:
             print(
                 f'"{artist}`s" albums from page {page} were already parsed!'
             )
         else:
-            titles = self.get_artist_albums(artist, page)
-            self.write_albums(artist, titles, albums_path)
+            self.write_albums(artist, missing, albums_path)
             self.save_covers(artist, page)
 
     def save_covers(self, artist: str, page: int) -> None:
@@ -655,7 +839,7 @@ class MusicParser:
             cover_name = f'{title}.jpg'
             albums_covers_folder = os.getenv('ALBUM_COVERS_FOLDER_PATH')
             path = os.path.join(albums_covers_folder, cover_name)
-            response = requests.get(
+            response = self.fetch(
                 item["url"], stream=True, headers=HEADERS
             )
             if response.status_code == 200:
@@ -665,7 +849,8 @@ class MusicParser:
             else:
                 print('Error while parsing:', response.status_code)
 
-    def write_albums_urls(self, artist: str, page: int = 1) -> None:
+    def write_albums_urls(self, artist: str, page: int = 1,
+                          titles: list[str] | None = None) -> None:
         """
         Отвечает за запись URL-адресов обложек альбомов исполнителей
         в JSON-файл
@@ -673,20 +858,23 @@ class MusicParser:
         Args:
             artist (str): никнейм пользователя
             page (int): номер страницы
+            titles (list[str] | None): уже загруженный список
+            альбомов страницы
 
         Returns:
             None
         """
-        titles = self.get_artist_albums(artist, page)
-        instances = []
-        for title in titles:
-            url = self.get_album_cover_url(artist, title)
-            print(f'{title} - {url}')
-            instances.append(AlbumURL(title, url).to_dict())
+        if titles is None:
+            titles = self.get_artist_albums(artist, page)
         folder = f'jsons/albums_urls/{artist}'
         os.makedirs(folder, exist_ok=True)
         filename = f'page={page}.json'
         path = os.path.join(folder, filename)
+        instances = self.existing_records(path, 'title', titles)
+        for title in titles:
+            url = self.get_album_cover_url(artist, title)
+            print(f'{title} - {url}')
+            instances.append(AlbumURL(title, url).to_dict())
         with open(path, 'w', encoding='utf-8') as file:
             json.dump(instances, file)
         print(f'Albums of "{artist}" from page="{page}" was saved into {path}')
@@ -696,24 +884,20 @@ class MusicParser:
         os.makedirs(folder, exist_ok=True)
         filename = f'{self.sanitize_filename(title)}.json'
         path = os.path.join(folder, filename)
-        data = self.get_album_songs(artist, title)
+        songs = self.get_album_songs(artist, title)
         with open(path, 'w', encoding='utf-8') as file:
-            json.dump(data, file)
+            songs.dump(file)
             print(
                 f'Songs from "{title}" of "{artist}" were written into "{filename}"')
 
 
 def main():
     """
-    Главная функция
+    Главная функция: запуск команд из cli.py,
+    например "python parser.py crawl-artist '21 Savage' --songs"
     """
-    parser = MusicParser()
-    artist = '21 Savage'
-    page = 1
-    parser.parse_albums()
-    titles = parser.get_artist_albums(artist, page)
-    for title in titles:
-        parser.write_album_songs(artist, title)
+    from cli import main as cli_main
+    cli_main()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,245 @@
+from collections import defaultdict
+from typing import TYPE_CHECKING, NamedTuple
+import heapq
+import itertools
+import json
+import os
+
+from config import ENUMS, LIMITS, PLANNER
+from data_classes import Artist, ArtistURL, Album
+
+if TYPE_CHECKING:
+    from parser import MusicParser
+
+
+class JobSpec(NamedTuple):
+    """
+    Описание задания на сбор данных
+    """
+    genres: tuple[str, ...] = ENUMS['GENRES']
+    artist_pages: int = LIMITS['ARTISTS_PAGE_LIMIT']
+    album_pages: int = LIMITS['ARTIST_ALBUMS_PAGE_LIMIT']
+    albums_per_artist: int | None = None
+
+
+class PageCountCache:
+    """
+    Сохраняемый на диск кэш количества страниц и элементов на них
+    """
+
+    def __init__(self, path: str = PLANNER['PAGE_COUNTS_PATH']):
+        self.path = path
+        self.counts: dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self.counts = json.load(file)
+
+    def get(self, key: str, default: int) -> int:
+        return self.counts.get(key, default)
+
+    def put(self, key: str, value: int) -> None:
+        self.counts[key] = value
+
+    def save(self) -> None:
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(self.counts, file)
+
+
+# Запросы конвейера parse_artists/parse_albums/write_album_songs
+# на одного исполнителя и на один альбом по типам страниц
+ARTIST_COST = {'genius': 2, 'images': PLANNER['GENIUS_MISS_RATE'],
+               'image': 1}
+ALBUM_COST = {'images': 2, 'album': 2, 'image': 1}
+
+# Наибольшее количество запросов на элемент работы планировщика
+SCHEDULER_COST = {'artists_page': 1, 'artist': 3,
+                  'albums_page': 1, 'album': 2}
+
+
+def estimate(spec: JobSpec, cache: PageCountCache | None = None) -> dict:
+    """
+    Оценивает количество запросов и объём трафика задания
+    по закэшированному количеству страниц
+
+    Args:
+        spec (JobSpec): задание
+        cache (PageCountCache | None): кэш количества страниц
+
+    Returns:
+        dict: запросы по типам страниц, всего запросов и байт
+    """
+    cache = cache or PageCountCache()
+    requests: defaultdict[str, float] = defaultdict(float)
+    for genre in spec.genres:
+        pages = min(spec.artist_pages,
+                    cache.get(f'genre/{genre}', spec.artist_pages))
+        artists = pages * cache.get('artists_per_page',
+                                    PLANNER['ARTISTS_PER_PAGE'])
+        albums = spec.album_pages * cache.get('albums_per_page',
+                                              PLANNER['ALBUMS_PER_PAGE'])
+        if spec.albums_per_artist is not None:
+            albums = min(albums, spec.albums_per_artist)
+        # Список жанров и число страниц в parse_artists и сама страница
+        # исполнителей, которая передаётся в parse_artists из обхода
+        requests['listing'] += 3 * pages
+        # Страница альбомов загружается один раз и передаётся в parse_albums
+        requests['listing'] += artists * spec.album_pages
+        for kind, count in ARTIST_COST.items():
+            requests[kind] += count * artists
+        for kind, count in ALBUM_COST.items():
+            requests[kind] += count * artists * albums
+    total_bytes = sum(count * PLANNER['PAGE_BYTES'][kind]
+                      for kind, count in requests.items())
+    return {
+        'requests': {kind: round(count) for kind, count in requests.items()},
+        'total_requests': round(sum(requests.values())),
+        'total_bytes': round(total_bytes),
+    }
+
+
+class PriorityScheduler:
+    """
+    Планировщик, обрабатывающий работу в порядке места исполнителя
+    в списке жанра: альбомы и песни самых популярных исполнителей
+    собираются первыми, даже если запуск прерван или ограничен
+    бюджетом запросов. Результаты записываются в то же дерево jsons,
+    что и у parse_artists/parse_albums, и сразу видны загрузчикам;
+    недособранные страницы дописывает обычный обход
+    """
+
+    def __init__(self, parser: 'MusicParser', spec: JobSpec,
+                 budget: int | None = None,
+                 cache: PageCountCache | None = None):
+        self.parser = parser
+        self.spec = spec
+        self.budget = budget
+        # Парсер демона живёт между заданиями, поэтому бюджет
+        # отсчитывается от запросов, сделанных до запуска
+        self.started = parser.stats['requests']
+        self.cache = cache or PageCountCache()
+        self.queue: list[tuple] = []
+        self.counter = itertools.count()
+        self.seen_artists: set[str] = set()
+        self.pages: dict[str, list[dict]] = {}
+
+    def push(self, rank: int, stage: int, kind: str, *args) -> None:
+        heapq.heappush(
+            self.queue, (rank, stage, next(self.counter), kind, args))
+
+    def append_record(self, path: str, key: str, record: dict) -> None:
+        """
+        Добавляет запись в JSON-файл страницы дерева jsons и атомарно
+        перезаписывает его, так что прерванный запуск оставляет
+        целые файлы. Записи, собранные ранее, сохраняются, а запись
+        с тем же ключом заменяется
+
+        Args:
+            path (str): путь к файлу страницы
+            key (str): поле, однозначно определяющее запись
+            record (dict): запись
+
+        Returns:
+            None
+        """
+        items = self.pages.get(path)
+        if items is None:
+            items = []
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as file:
+                    items = json.load(file)
+            self.pages[path] = items
+        items[:] = [item for item in items if item[key] != record[key]]
+        items.append(record)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            json.dump(items, file)
+        os.replace(f'{path}.tmp', path)
+
+    def within_budget(self, kind: str) -> bool:
+        """
+        Проверяет, хватит ли бюджета запросов на элемент работы
+
+        Args:
+            kind (str): тип элемента работы
+
+        Returns:
+            bool: True, если элемент можно обработать
+        """
+        if self.budget is None:
+            return True
+        cost = SCHEDULER_COST[kind]
+        return self.spent + cost <= self.budget
+
+    @property
+    def spent(self) -> int:
+        return self.parser.stats['requests'] - self.started
+
+    def run(self) -> None:
+        """
+        Выполняет задание до исчерпания очереди или бюджета
+
+        Returns:
+            None
+        """
+        per_page = self.cache.get('artists_per_page',
+                                  PLANNER['ARTISTS_PER_PAGE'])
+        for genre in self.spec.genres:
+            for page in range(1, self.spec.artist_pages + 1):
+                self.push((page - 1) * per_page, 0, 'artists_page',
+                          genre, page)
+        while self.queue:
+            rank, _, _, kind, args = heapq.heappop(self.queue)
+            if not self.within_budget(kind):
+                print(f'Бюджет в {self.budget} запросов исчерпан, '
+                      f'в очереди осталось {len(self.queue) + 1} задач')
+                break
+            getattr(self, f'process_{kind}')(rank, *args)
+        self.cache.save()
+
+    def process_artists_page(self, rank: int, genre: str, page: int) -> None:
+        artists = self.parser.get_paginated_artists_by_genre(genre, page)
+        if not artists:
+            self.cache.put(f'genre/{genre}', page - 1)
+            return
+        self.cache.put('artists_per_page', len(artists))
+        for position, artist in enumerate(artists):
+            if artist not in self.seen_artists:
+                self.seen_artists.add(artist)
+                self.push(rank + position, 1, 'artist', artist, genre, page)
+
+    def process_artist(self, rank: int, artist: str, genre: str,
+                       page: int) -> None:
+        description = self.parser.get_artist_description(artist)
+        image_url = self.parser.get_artist_image_url(artist)
+        target_file = f'page={page}.json'
+        self.append_record(
+            os.path.join('jsons/artists', genre, target_file), 'username',
+            Artist(artist, f'{artist}.jpg', description).to_dict())
+        self.append_record(
+            os.path.join('jsons/genre_artists', genre, target_file),
+            'username', ArtistURL(artist, image_url).to_dict())
+        for page in range(1, self.spec.album_pages + 1):
+            self.push(rank, 2, 'albums_page', artist, page)
+
+    def process_albums_page(self, rank: int, artist: str, page: int) -> None:
+        titles = self.parser.get_artist_albums(artist, page)
+        if titles:
+            self.cache.put('albums_per_page', len(titles))
+        per_page = self.cache.get('albums_per_page',
+                                  PLANNER['ALBUMS_PER_PAGE'])
+        for position, title in enumerate(titles):
+            index = (page - 1) * per_page + position
+            if (self.spec.albums_per_artist is None
+                    or index < self.spec.albums_per_artist):
+                self.push(rank, 3 + index, 'album', artist, title, page)
+
+    def process_album(self, rank: int, artist: str, title: str,
+                      page: int) -> None:
+        publication_date = self.parser.get_publication_date(artist, title)
+        self.append_record(
+            os.path.join('jsons/albums', artist, f'page={page}.json'), 'name',
+            Album(title, publication_date, f'{title}.jpg').to_dict())
+        self.parser.write_album_songs(artist, title)
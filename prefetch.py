@@ -0,0 +1,46 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import deque
+from typing import Callable, Iterator, TypeVar
+
+
+T = TypeVar('T')
+
+
+def prefetch_pages(load_page: Callable[[int], list[T]], last_page: int,
+                   depth: int,
+                   first_page: int = 1) -> Iterator[tuple[int, list[T]]]:
+    """
+    Постранично обходит список, заранее загружая в фоне
+    следующие страницы, пока обрабатывается текущая.
+    Обход завершается на последней или первой пустой странице,
+    а ещё не начатые загрузки отменяются
+
+    Args:
+        load_page (Callable[[int], list[T]]): загрузка страницы по номеру
+        last_page (int): номер последней страницы
+        depth (int): количество страниц, загружаемых заранее
+        first_page (int): номер первой страницы обхода
+
+    Returns:
+        Iterator[tuple[int, list[T]]]: номер страницы и её содержимое
+    """
+    depth = max(depth, 0)
+    with ThreadPoolExecutor(max_workers=depth + 1) as executor:
+        pending: deque[tuple[int, Future]] = deque()
+        next_page = first_page
+        try:
+            while True:
+                while next_page <= last_page and len(pending) <= depth:
+                    pending.append(
+                        (next_page, executor.submit(load_page, next_page)))
+                    next_page += 1
+                if not pending:
+                    return
+                page, future = pending.popleft()
+                items = future.result()
+                if not items:
+                    return
+                yield page, items
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,228 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple, TextIO
+from urllib.parse import urlsplit, unquote, parse_qs
+import argparse
+import json
+import os
+import time
+
+from config import ARCHIVE
+from html_archive import HtmlArchive
+from negative_cache import NegativeCache
+from parser import MusicParser
+
+
+class ArchivedResponse(NamedTuple):
+    """
+    Ответ сервера, восстановленный из архива
+    """
+    url: str
+    status_code: int
+    content: bytes
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+
+class ReplayParser(MusicParser):
+    """
+    MusicParser, который вместо сети читает страницы из архива
+    """
+
+    def __init__(self, archive: HtmlArchive):
+        # MusicParser.__init__ не вызывается: он загружает кэш
+        # отрицательных результатов с диска и может открыть архив
+        # на запись, а повторное извлечение только читает архив
+        self.negative_cache = NegativeCache(path=None)
+        self.breakers = {}
+        self.stats = {'requests': 0, 'bytes': 0, 'seconds': 0.0}
+        self.archive = None
+        self.source = archive
+
+    # Вместо requests.Response возвращается ответ из архива
+    # с теми же полями, которые читают методы разбора
+    def fetch(  # type: ignore[override]
+            self, url: str, **kwargs) -> ArchivedResponse:
+        entry = self.source.get(url)
+        if entry is None:
+            raise KeyError(f'Страница "{url}" отсутствует в архиве')
+        return ArchivedResponse(url, entry['status'], self.source.read(entry))
+
+    def extractors(self, entry: dict) -> dict[str, Callable]:
+        """
+        Возвращает все методы извлечения данных, применимые к странице
+
+        Args:
+            entry (dict): запись индекса архива
+
+        Returns:
+            dict[str, Callable]: вызовы методов по их названиям
+        """
+        parts = urlsplit(entry['url'])
+        path = [unquote(part) for part in parts.path.split('/') if part]
+        query = parse_qs(parts.query)
+        page = int(query.get('page', ['1'])[0])
+        match entry['type']:
+            case 'genres':
+                return {'get_all_genres': self.get_all_genres}
+            case 'genre_artists':
+                genre = path[2]
+                # Страница без номера запрашивается только
+                # для определения количества страниц
+                if 'page' not in query:
+                    return {
+                        'get_max_pages': lambda: self.get_max_pages(genre),
+                    }
+                return {
+                    'get_paginated_artists_by_genre':
+                        lambda: self.get_paginated_artists_by_genre(
+                            genre, page),
+                }
+            case 'genius_artist':
+                artist = path[1]
+                return {
+                    'get_artist_description':
+                        lambda: self.get_artist_description(artist),
+                    'get_artist_image_url':
+                        lambda: self.get_artist_image_url(artist),
+                }
+            case 'artist_albums':
+                artist = path[2]
+                extractors: dict[str, Callable] = {
+                    'get_artist_albums':
+                        lambda: self.get_artist_albums(artist, page),
+                }
+                # Количество страниц берётся с первой страницы альбомов
+                if page == 1:
+                    extractors['get_albums_max_pages'] = \
+                        lambda: self.get_albums_max_pages(artist)
+                return extractors
+            case 'album':
+                artist, title = path[2], path[3]
+                return {
+                    'get_album_songs':
+                        lambda: self.get_album_songs(
+                            artist, title).to_dicts(),
+                    'get_publication_date':
+                        lambda: self.get_publication_date(artist, title),
+                }
+            case 'album_images':
+                artist, title = path[2], path[3]
+                return {
+                    'get_album_cover_url':
+                        lambda: self.get_album_cover_url(artist, title),
+                }
+        return {}
+
+
+# Парсер процесса пула: индекс архива читается один раз на процесс,
+# а не на каждую задачу
+replay_parser: ReplayParser | None = None
+
+
+def init_replay(root: str) -> None:
+    """
+    Открывает архив в процессе пула
+
+    Args:
+        root (str): корень архива
+
+    Returns:
+        None
+    """
+    global replay_parser
+    replay_parser = ReplayParser(HtmlArchive(root))
+
+
+def replay_chunk(entries: list[dict]) -> list[dict]:
+    """
+    Повторно извлекает данные из части архива в отдельном процессе
+
+    Args:
+        entries (list[dict]): записи индекса
+
+    Returns:
+        list[dict]: результаты или ошибки методов по каждой странице
+    """
+    parser = replay_parser
+    if parser is None:
+        raise RuntimeError('Архив не открыт: init_replay не вызван')
+    results = []
+    for entry in entries:
+        result = {}
+        for name, extractor in parser.extractors(entry).items():
+            try:
+                result[name] = extractor()
+            except Exception as e:
+                result[name] = {'error': f'{type(e).__name__}: {e}'}
+        if result:
+            results.append(
+                {'url': entry['url'], 'type': entry['type'], **result})
+    return results
+
+
+def reextract(root: str = ARCHIVE['ROOT'],
+              out_dir: str = ARCHIVE['REEXTRACT_DIR'],
+              workers: int | None = None, chunk_size: int = 200) -> float:
+    """
+    Повторно извлекает данные из всего архива на всех ядрах
+    и записывает их в JSON Lines по типам страниц
+
+    Args:
+        root (str): корень архива
+        out_dir (str): папка для результатов
+        workers (int | None): количество процессов
+        chunk_size (int): количество страниц в одной задаче
+
+    Returns:
+        float: скорость обработки, страниц в секунду
+    """
+    archive = HtmlArchive(root)
+    entries = list(archive.iter_entries())
+    chunks = [entries[i:i + chunk_size]
+              for i in range(0, len(entries), chunk_size)]
+    os.makedirs(out_dir, exist_ok=True)
+    outputs: dict[str, TextIO] = {}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_replay,
+                             initargs=(root,)) as executor:
+        for results in executor.map(replay_chunk, chunks):
+            for result in results:
+                output = outputs.get(result['type'])
+                if output is None:
+                    path = os.path.join(out_dir, f'{result["type"]}.jsonl')
+                    output = outputs[result['type']] = open(
+                        path, 'w', encoding='utf-8')
+                output.write(json.dumps(result, ensure_ascii=False,
+                                        default=str) + '\n')
+    for output in outputs.values():
+        output.close()
+    elapsed = time.perf_counter() - started
+    rate = len(entries) / elapsed if elapsed else 0.0
+    print(f'Обработано страниц: {len(entries)}, {elapsed:.1f} сек., '
+          f'{rate:.0f} страниц/сек.')
+    return rate
+
+
+def main():
+    """
+    Точка входа команд архива: статистика и повторное извлечение
+    """
+    arg_parser = argparse.ArgumentParser(
+        description='Архив HTML-страниц и повторное извлечение данных')
+    arg_parser.add_argument('command', choices=('stats', 'reextract'))
+    arg_parser.add_argument('--root', default=ARCHIVE['ROOT'])
+    arg_parser.add_argument('--out', default=ARCHIVE['REEXTRACT_DIR'])
+    arg_parser.add_argument('--workers', type=int)
+    args = arg_parser.parse_args()
+    stats = HtmlArchive(args.root).stats()
+    print(f'Страниц: {stats["pages"]}, исходный объём: '
+          f'{stats["raw_bytes"]} байт, на диске: {stats["stored_bytes"]} '
+          f'байт, сжатие: {stats["ratio"]:.1f}x')
+    if args.command == 'reextract':
+        reextract(args.root, args.out, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+import re
+
+
+def sanitize_filename(filename: str) -> str:
+    """
+    Очищает название файла от лишних символов
+
+    Args:
+        filename (str): название файла
+
+    Returns:
+        str: преобразованное название файла
+    """
+    return re.sub(r'[\\/*?:"<>|]', '', filename)